@@ -1,3 +1,5 @@
+import logging
+
 from .core.domino_game import DominoGame
 from .ai.ai_stratigies import (
     PlacementContext,
@@ -10,6 +12,8 @@ from .parser import create_parser
 
 
 def main():
+    # make use of logging if you make 2 AI compete each other
+    logging.basicConfig(filename="logging.txt", filemode="w", level=logging.INFO)
 
     parser = create_parser()
     args = parser.parse_args()
@@ -21,7 +25,7 @@ def main():
             config[k] = v
 
     # initial game engine
-    game = DominoGame(config["players"], config["seed"])
+    game = DominoGame(config["players"], config["seed"], config.get("num_tiles", 7))
 
     ai_strategies = {
         "mcts": MCTSStrategy(game),
@@ -30,7 +34,10 @@ def main():
     }
     placement_context = PlacementContext(ai_strategies[config["strategy"]])
 
-    game.casual_game(placement_context, config["score"])
+    try:
+        game.casual_game(placement_context, config["score"])
+    finally:
+        ai_strategies["mcts"].close()
 
 
 if __name__ == "__main__":
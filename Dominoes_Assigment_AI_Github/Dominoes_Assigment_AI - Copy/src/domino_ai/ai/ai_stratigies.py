@@ -1,38 +1,66 @@
-def match_tile_in_real_hand(simulated_tile, real_hand):
-    #print("[DEBUG] Simulated tile:", simulated_tile, "Type:", type(simulated_tile))
-    #print("[DEBUG] Real hand:", real_hand)
-    for tile in real_hand:
-        #print("   └── Comparing with tile:", tile, "Type:", type(tile))
-        if (tile.left == simulated_tile.left and tile.right == simulated_tile.right) or \
-           (tile.right == simulated_tile.left and tile.left == simulated_tile.right):
-            #print("   ✅ Match found!")
-            return tile
-
-    raise ValueError(f"[SAFEGUARD] Tile {simulated_tile} not found in real hand: {real_hand}")
-
-
-
 from abc import ABC, abstractmethod
 
-__all__ = ["PlacementContext", "BlindStrategy", "MCTSStrategy", "RuleBasedStrategy", "ClairvoyantStrategy", "ClairvoyanceStrategy"]
+__all__ = ["PlacementContext", "BlindStrategy", "MCTSStrategy", "RuleBasedStrategy", "ClairvoyanceStrategy"]
 
 import numpy as np
 import os
 import random
 
 from ..core.domino_components import Player, AI_Player
+from ..core.bitboard import tile_id
 from .mcts import MCTS
+from .rollout_policy import RolloutPolicy
 from ..core.utils import get_ground_frequency, get_hand_frequency, load_config
 
 
 args = load_config(os.path.join(os.path.dirname(__file__), "hyper_parameters.yaml"))
 
 
+def place_action(game, state, action):
+    """returns the real hand tile of a (tile_id, side) action, and makes `get_next_state` place it on that side."""
+    state.players[state.turn_idx].double_ended_tile_score = action[1]
+    return game.get_action_tile(state, action)
+
+
 class AIStrategy(ABC):
     @abstractmethod
     def get_domino_placement(self, hand, board):
         pass
 
+    @abstractmethod
+    def choose_action(self, state):
+        """picks a (tile_id, side) action for the player with the turn, leaving state and players untouched.
+
+        Args:
+            state (DominoState): current domino state
+
+        Returns:
+            Tuple[int,str]: chosen action, None when no tile can be placed
+            Dict[Tuple[int,str],float]: score of each legal action
+        """
+        pass
+
+    def get_domino_placements(self, states, return_scores=False):
+        """Batched counterpart of `get_domino_placement`, e.g. to re-score every position of a logged game.
+
+        Nothing is placed and no state or player is modified. Strategies that can share work across the batch
+        override this, the others pick their moves one state at a time.
+
+        Args:
+            states (List[DominoState]): positions to pick a move in
+            return_scores (bool, optional): also return the score of every legal action. Defaults to False.
+
+        Returns:
+            List[Tuple[int,str]]: chosen (tile_id, side) action of each state, None when no tile can be placed
+            List[Dict[Tuple[int,str],float]]: score of each legal action per state, if return_scores
+        """
+        actions, scores = [], []
+        for state in states:
+            action, action_scores = self.choose_action(state)
+            actions.append(action)
+            scores.append(action_scores)
+        return (actions, scores) if return_scores else actions
+
 
 class BlindStrategy(AIStrategy):
     """Blindly choose tile from valid hand tiles"""
@@ -45,23 +73,14 @@ class BlindStrategy(AIStrategy):
             pass
 
     def get_domino_placement(self, state):
-        valid_moves = [
-            i[1]
-            for i in zip(
-                [
-                    any(condition)
-                    for condition in self.game.get_valid_moves(
-                        state.players[state.turn_idx],
-                        state.ground,
-                    )
-                ],
-                state.players[state.turn_idx].hand,
-            )
-            if i[0]
-        ]
-        action = random.choice(valid_moves)
-        real_hand = state.players[state.turn_idx].hand
-        return match_tile_in_real_hand(action, real_hand)
+        action = random.choice(self.game.get_actions(state))
+        return place_action(self.game, state, action)
+
+    def choose_action(self, state):
+        actions = self.game.get_actions(state)
+        if not actions:
+            return None, {}
+        return random.choice(actions), {action: 1 / len(actions) for action in actions}
 
 
 class RuleBasedStrategy(AIStrategy):
@@ -74,89 +93,107 @@ class RuleBasedStrategy(AIStrategy):
         self.args = args["rule_based"]
 
     def get_domino_placement(self, state):
-        ai = state.players[state.turn_idx]
-        ai.double_ended_tile_score = None
-        valid_tiles = [
-            i[1]
-            for i in zip(
-                [
-                    any(condition)
-                    for condition in self.game.get_valid_moves(
-                        ai,
-                        state.ground,
-                    )
-                ],
-                ai.hand,
-            )
-            if i[0]
-        ]
+        action, _ = self.choose_action(state)
+        return place_action(self.game, state, action)
 
-        # prioritize value
-        scores = [tile.count_tile() * self.args["tile_value"] for tile in valid_tiles]
-        # prioritize doubles
-        scores = [
-            s * self.args["double_tiles"] if v.is_double() else s
-            for v, s in zip(valid_tiles, scores)
-        ]
+    def choose_action(self, state):
+        actions, scores = self.get_domino_placements([state], return_scores=True)
+        return actions[0], scores[0]
 
-        # prioritize versatility
-        valid_tiles_conditions = [
-            condition for condition in ai.conditions if any(condition)
-        ]
-        hand_frequency = get_hand_frequency(ai.hand)
-        for idx, condition in enumerate(valid_tiles_conditions):
-            if all(condition):
-                playing_left = hand_frequency[valid_tiles[idx].left]
-                playing_right = hand_frequency[valid_tiles[idx].right]
-                ai.double_ended_tile_score = [
-                    playing_left * self.args["tiles_in_hand"],
-                    playing_right * self.args["tiles_in_hand"],
-                ]
-                continue
-            elif condition[0]:
-                coef = hand_frequency[valid_tiles[idx].left]
-            elif condition[1]:
-                coef = hand_frequency[valid_tiles[idx].right]
-            scores[idx] += coef * self.args["tiles_in_hand"]
+    def get_features(self, state):
+        """Lists the valid tiles of the player with the turn, with the features the rules score them by.
+
+        Args:
+            state (DominoState): current domino state
 
-        # prtioritize playing safe
+        Returns:
+            List[Tuple[int,str]]: action of each valid tile, in hand order. Tiles fitting both ends are placed on the side the rules prefer.
+            List[Tuple[int,bool,int,int,bool]]: tile value, double, tiles in hand showing the half left open, tiles on ground
+                showing the end covered, and blocking (the half left open is in memory) of each valid tile
+        """
+        ai = state.players[state.turn_idx]
+        # (left, right) placement availability of each valid tile
+        sides = {}
+        for tid, side in self.game.get_actions(state):
+            sides.setdefault(tid, [False, False])[side == "r"] = True
+        hand_frequency = get_hand_frequency(ai.hand)
         ground_frequency = get_ground_frequency(state.ground)
-        for idx, condition in enumerate(valid_tiles_conditions):
-            if all(condition):
-                playing_left = hand_frequency[valid_tiles[idx].right]
-                playing_right = hand_frequency[valid_tiles[idx].left]
-                ai.double_ended_tile_score[0] -= (
-                    playing_left * self.args["tiles_in_ground"]
+        if state.ground:
+            left_end, right_end = self.game.get_ground_ends(state.ground)
+
+        actions, features = [], []
+        for tile in ai.hand:
+            condition = sides.get(tile_id(tile))
+            if condition is None:
+                continue
+            if not state.ground:
+                side = "l"
+                in_hand = hand_frequency[tile.left]
+                on_ground = 0
+                tile_half = tile.left
+            elif all(condition) or left_end == right_end:
+                # fits both ends, `generate_moves` only lists the left placement when they show the same pip.
+                # The tile is read facing the right end, the other half being left open.
+                open_half = tile.left + tile.right - right_end
+                # prioritize versatility and playing safe, by choosing the side
+                playing_left = (
+                    hand_frequency[right_end] * self.args["tiles_in_hand"]
+                    - hand_frequency[open_half] * self.args["tiles_in_ground"]
                 )
-                ai.double_ended_tile_score[1] -= (
-                    playing_right * self.args["tiles_in_ground"]
+                playing_right = (
+                    hand_frequency[open_half] * self.args["tiles_in_hand"]
+                    - hand_frequency[right_end] * self.args["tiles_in_ground"]
                 )
-                continue
-
-            elif condition[0]:
-                coef = ground_frequency[valid_tiles[idx].right]
-            elif condition[1]:
-                coef = ground_frequency[valid_tiles[idx].left]
-            scores[idx] -= coef * self.args["tiles_in_ground"]
-
-        if ai.memory:
-            for idx, condition in enumerate(valid_tiles_conditions):
-                if condition[0]:
-                    tile_half = valid_tiles[idx].left
-                elif condition[1]:
-                    tile_half = valid_tiles[idx].right
-                if tile_half in ai.memory:
-                    scores[idx] += self.args["blocking_bonus"]
-
-        if ai.double_ended_tile_score:
-            ai.double_ended_tile_score = (
-                "l"
-                if ai.double_ended_tile_score[0] >= ai.double_ended_tile_score[1]
-                else "r"
-            )
-        action = valid_tiles[np.argmax(scores)]
-        real_hand = state.players[state.turn_idx].hand
-        return match_tile_in_real_hand(action, real_hand)
+                side = "l" if playing_left >= playing_right else "r"
+                in_hand = on_ground = 0
+                tile_half = right_end
+            else:
+                side = "l" if condition[0] else "r"
+                # the tile covers the end it's placed on, and leaves its other half open
+                end = left_end if side == "l" else right_end
+                tile_half = tile.left + tile.right - end
+                in_hand = hand_frequency[tile_half]
+                on_ground = ground_frequency[end]
+            blocking = bool(ai.memory) and tile_half in ai.memory
+            actions.append((tile_id(tile), side))
+            features.append((tile.count_tile(), tile.is_double(), in_hand, on_ground, blocking))
+        return actions, features
+
+    def get_domino_placements(self, states, return_scores=False):
+        """Scores the valid tiles of every state at once, with the rules as a vectorized linear model over `get_features`."""
+        actions, features, owners = [], [], []
+        for i, state in enumerate(states):
+            state_actions, state_features = self.get_features(state)
+            actions += state_actions
+            features += state_features
+            owners += [i] * len(state_actions)
+
+        features = np.array(features, dtype=np.float64).reshape(-1, 5)
+        # prioritize value, doubles, versatility, playing safe and blocking
+        scores = (
+            features[:, 0]
+            * self.args["tile_value"]
+            * np.where(features[:, 1] > 0, self.args["double_tiles"], 1)
+            + features[:, 2] * self.args["tiles_in_hand"]
+            - features[:, 3] * self.args["tiles_in_ground"]
+            + features[:, 4] * self.args["blocking_bonus"]
+        )
+
+        best = [None] * len(states)
+        tile_scores = [{} for _ in states]
+        for action, score, i in zip(actions, scores.tolist(), owners):
+            # the first tile in hand order wins ties
+            if best[i] is None or score > tile_scores[i][best[i][0]]:
+                best[i] = action
+            tile_scores[i][action[0]] = score
+        if not return_scores:
+            return best
+        # a tile fitting both ends scores the same on either side
+        state_scores = [
+            {action: tile_scores[i][action[0]] for action in self.game.get_actions(state)}
+            for i, state in enumerate(states)
+        ]
+        return best, state_scores
 
 
 class MCTSStrategy(AIStrategy):
@@ -166,50 +203,46 @@ class MCTSStrategy(AIStrategy):
 
     def __init__(self, game):
         self.game = game
-        self.mcts = MCTS(game, args["mcts"])
+        # the rule based rollout policy is weighted like `RuleBasedStrategy`
+        self.mcts = MCTS(game, dict(args["mcts"], rule_based=args["rule_based"]))
+
+    def close(self):
+        """shuts the worker processes of parallel search down, see `MCTS.close`."""
+        self.mcts.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
     def get_domino_placement(self, state):
+        action, _ = self.choose_action(state)
+        if action is None:
+            #print("[WARN] MCTS returned no moves. Falling back to random valid move.")
+            action = random.choice(self.game.get_actions(state))
+        return place_action(self.game, state, action)
+
+    def choose_action(self, state):
         if not state.ground:
-            ai_player = state.players[state.turn_idx]
-            action = ai_player.hand[
-                max(
-                    enumerate([tile.count_tile() for tile in ai_player.hand]),
-                    key=lambda x: x[1],
-                )[0]
-            ]
-            real_hand = state.players[state.turn_idx].hand
-            return match_tile_in_real_hand(action, real_hand)
-    
-        ai_state = state.copy()
-        ai_state.turn_idx = state.turn_idx
-        for i, p_player in enumerate(ai_state.players):
-            ai_state.players[i] = AI_Player(f"ai {i+1}", p_player.hand)
-    
-        mcts_probs = self.mcts.search(ai_state)
-    
+            # open with the heaviest tile
+            tile = max(state.players[state.turn_idx].hand, key=lambda tile: tile.count_tile())
+            return (tile_id(tile), "l"), {(tile_id(tile), "l"): 1.0}
+
+        # one compact copy per decision, the search walks it down and back up with make/unmake moves
+        ai_state = state.compact()
+
+        if self.mcts.args.get("telemetry_file"):
+            # one JSON line of search telemetry per move
+            mcts_probs, telemetry = self.mcts.search(ai_state, return_telemetry=True)
+            with open(self.mcts.args["telemetry_file"], "a") as file:
+                file.write(telemetry.to_json() + "\n")
+        else:
+            mcts_probs = self.mcts.search(ai_state)
         if not mcts_probs:
-            #print("[WARN] MCTS returned no moves. Falling back to random valid move.")
-            valid_moves = [
-                i[1]
-                for i in zip(
-                    [
-                        any(condition)
-                        for condition in self.game.get_valid_moves(
-                            state.players[state.turn_idx], state.ground
-                        )
-                    ],
-                    state.players[state.turn_idx].hand,
-                )
-                if i[0]
-            ]
-            action = random.choice(valid_moves)
-            real_hand = state.players[state.turn_idx].hand
-            return match_tile_in_real_hand(action, real_hand)
-    
+            return None, {}
         action = mcts_probs[np.argmax([i[0] for i in mcts_probs])][1]
-        real_hand = state.players[state.turn_idx].hand
-        return match_tile_in_real_hand(action, real_hand)
-
+        return action, {a: float(p) for p, a in mcts_probs}
 
 
 class AlphaBetaMiniMax(AIStrategy):
@@ -222,56 +255,49 @@ class AlphaBetaMiniMax(AIStrategy):
 class ClairvoyanceStrategy(AIStrategy):
     """Averaging Over Clairvoyance Strategy.
     Simulates possible future states to evaluate the best move.
+
+    Args:
+        game (DominoGame): game engine
+        num_simulations (int, optional): simulated games per action. Defaults to 10.
+        policy (RolloutPolicy, optional): picks the moves of simulated games. Defaults to None, random moves.
     """
 
-    def __init__(self, game, num_simulations=10):
+    def __init__(self, game, num_simulations=10, policy: RolloutPolicy = None):
         self.game = game
         self.num_simulations = num_simulations
+        self.policy = policy
 
     def get_domino_placement(self, state):
-        valid_moves = [
-            i[1]
-            for i in zip(
-                [
-                    any(condition)
-                    for condition in self.game.get_valid_moves(
-                        state.players[state.turn_idx],
-                        state.ground,
-                    )
-                ],
-                state.players[state.turn_idx].hand,
-            )
-            if i[0]
-        ]
-
-        if not valid_moves:
+        action, _ = self.choose_action(state)
+        if action is None:
             return None
+        return place_action(self.game, state, action)
+
+    def choose_action(self, state):
+        actions = self.game.get_actions(state)
+        if not actions:
+            return None, {}
 
+        # one copy per decision, every simulation is played onto it and then undone
+        simulated_state = state.copy()
         scores = []
-        for move in valid_moves:
+        for action in actions:
             total_score = 0
             for _ in range(self.num_simulations):
-                simulated_state = state.copy()
-                # Use get_next_state instead of apply_move
-                next_state = self.game.get_next_state(
-                    simulated_state, 
-                    move,
-                    simulated_state.players[simulated_state.turn_idx]
-                )
-                total_score += self.simulate_game(next_state)
+                record = self.game.apply_move(simulated_state, action)
+                total_score += self.simulate_game(simulated_state)
+                self.game.undo_move(simulated_state, record)
             scores.append(total_score / self.num_simulations)
 
-        best_move_idx = np.argmax(scores)
-        real_hand = state.players[state.turn_idx].hand
-        return match_tile_in_real_hand(valid_moves[best_move_idx], real_hand)
-
+        return actions[np.argmax(scores)], dict(zip(actions, scores))
 
     def simulate_game(self, state):
-        """Simulates a game from the current state and returns a score."""
+        """Simulates a game from the current state and returns a score. state is restored before returning."""
         no_progress_turns = 0  # Counter to track consecutive turns with no progress
         max_no_progress_turns = len(state.players) * 2  # Safeguard limit
         max_simulation_steps = 100  # Timeout safeguard
         steps = 0  # Step counter
+        records = []
 
         while not self.game.is_game_over(state):  # Ensure is_game_over exists
             steps += 1
@@ -280,38 +306,24 @@ class ClairvoyanceStrategy(AIStrategy):
 
             current_player = state.players[state.turn_idx]
             if isinstance(current_player, AI_Player):
-                valid_moves = [
-                    i[1]
-                    for i in zip(
-                        [
-                            any(condition)
-                            for condition in self.game.get_valid_moves(
-                                current_player, state.ground
-                            )
-                        ],
-                        current_player.hand,
-                    )
-                    if i[0]
-                ]
+                valid_moves = self.game.get_actions(state)
                 if not valid_moves:  # Skip turn if no valid moves
                     no_progress_turns += 1
                     if no_progress_turns >= max_no_progress_turns:
                         break  # Safeguard to prevent infinite loop
-                    state.change_turn()
+                    records.append(self.game.apply_move(state, None))
                     continue
                 no_progress_turns = 0  # Reset counter if a valid move is made
-                move = random.choice(valid_moves)
-                # Use get_next_state instead of apply_move
-                state = self.game.get_next_state(
-                    state,
-                    move,
-                    current_player
-                )
-                state.change_turn()
+                move = random.choice(valid_moves) if self.policy is None else self.policy.choose(state, valid_moves)
+                records.append(self.game.apply_move(state, move))
             else:
                 break  # Stop simulation if a human player is encountered
-        return self.game.calculate_score(state)
-    
+        score = self.game.calculate_score(state)
+        for record in reversed(records):
+            self.game.undo_move(state, record)
+        return score
+
+
 class PlacementContext:
     def __init__(self, strategy: AIStrategy):
         self.strategy = strategy
@@ -321,3 +333,7 @@ class PlacementContext:
 
     def calc(self, *args):
         return self.strategy.get_domino_placement(*args)
+
+    def calc_many(self, states, return_scores=False):
+        """picks a move in each of states at once, see `AIStrategy.get_domino_placements`."""
+        return self.strategy.get_domino_placements(states, return_scores)
@@ -0,0 +1,176 @@
+import random
+
+import numpy as np
+
+from ..core.bitboard import CompactDominoState, iter_ids, void_tiles
+from .tree import SIDES
+
+# shuffles tried by `determinize` to deal the hidden tiles around the opponents' voids
+DEAL_ATTEMPTS = 20
+
+
+def _deal(state, seat, hidden, forbidden):
+    """Deals the shuffled hidden tiles to the other seats, each taking the first ones it may hold, the most constrained seats first.
+
+    Returns:
+        List[int] | None: hand masks, seat's own one included, or None when some seat is left short of tiles
+    """
+    hands = state.hands[:]
+    others = sorted(
+        (other for other in range(len(hands)) if other != seat), key=lambda other: -forbidden[other].bit_count()
+    )
+    for other in others:
+        count = hands[other].bit_count()
+        dealt = [tid for tid in hidden if not forbidden[other] >> tid & 1][:count]
+        if len(dealt) < count:
+            return None
+        mask = 0
+        for tid in dealt:
+            mask |= 1 << tid
+        hands[other] = mask
+        hidden = [tid for tid in hidden if not mask >> tid & 1]
+    return hands
+
+
+def determinize(state, seat, rng=random):
+    """Samples the tiles seat can't see, the opponents' hands and the boneyard, consistently with what it observes.
+
+    The seat sees its own hand, the ground, how many tiles every other hand and the boneyard hold, and the pip
+    values each opponent showed it doesn't hold by drawing or passing (`CompactDominoState.voids`). The hidden
+    tiles are dealt at random among them, keeping those counts and giving no opponent a tile showing one of its
+    voids. A greedy deal can get stuck where another one wouldn't, so it's retried on a fresh shuffle up to
+    `DEAL_ATTEMPTS` times; should all of them fail, the voids are ignored for that determinization.
+
+    Args:
+        state (CompactDominoState): real state
+        seat (int): observing seat
+        rng (random.Random, optional): generator of the deal. Defaults to the `random` module.
+
+    Returns:
+        CompactDominoState: one determinization of state, that seat can't tell apart from it
+    """
+    hidden = list(iter_ids(state.full & ~state.played & ~state.hands[seat]))
+    forbidden = [void_tiles(voids) for voids in state.voids]
+    forbidden[seat] = 0
+    for _ in range(DEAL_ATTEMPTS):
+        rng.shuffle(hidden)
+        hands = _deal(state, seat, hidden, forbidden)
+        if hands is not None:
+            break
+    else:
+        hands = _deal(state, seat, hidden, [0] * len(forbidden))
+    boneyard = state.full & ~state.played
+    for hand in hands:
+        boneyard &= ~hand
+    return CompactDominoState(
+        hands,
+        boneyard,
+        state.left,
+        state.right,
+        state.played,
+        state.turn_idx,
+        full=state.full,
+        voids=state.voids[:],
+    )
+
+
+class InfoSetTree:
+    """Single-observer information set tree, for ISMCTS.
+
+    A node is an information set of the observing seat: the sequence of placements leading to it from the root.
+    Every placement is public, and draws aren't part of the tree, so the seat can't tell apart the positions
+    reaching a node, whatever the hidden tiles. Different determinizations allow different actions at a node,
+    so children are added one action at a time, as they're first met, and kept in a dict of each node.
+
+    Statistics are struct-of-arrays, as in `Tree`. Besides visits and values, each node counts how often it was
+    available, i.e. legal in the determinization of an iteration that selected among its siblings. UCB uses that
+    count in place of the parent's visits, so actions that are seldom legal aren't penalized for it.
+
+    Args:
+        capacity (int, optional): number of nodes allocated up front. Defaults to 1024.
+    """
+
+    def __init__(self, capacity=1024):
+        self.parent = np.full(capacity, -1, dtype=np.int32)
+        self.tile = np.zeros(capacity, dtype=np.int8)
+        self.side = np.zeros(capacity, dtype=np.int8)
+        self.visits = np.zeros(capacity, dtype=np.int64)
+        self.values = np.zeros(capacity, dtype=np.float64)
+        self.avails = np.zeros(capacity, dtype=np.int64)
+        # (tile_id, side) action -> child, of each node
+        self.children = []
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self, size):
+        capacity = len(self.parent)
+        while capacity < size:
+            capacity *= 2
+        for name, fill in (("parent", -1), ("tile", 0), ("side", 0), ("visits", 0), ("values", 0), ("avails", 0)):
+            old = getattr(self, name)
+            new = np.full(capacity, fill, dtype=old.dtype)
+            new[: len(old)] = old
+            setattr(self, name, new)
+
+    def add_root(self):
+        return self.add_child(-1, None)
+
+    def add_child(self, node, action):
+        """adds the child reached from node by a (tile_id, side) action, and returns its index."""
+        if self.size == len(self.parent):
+            self._grow(self.size + 1)
+        child = self.size
+        self.size += 1
+        self.parent[child] = node
+        self.children.append({})
+        if action is not None:
+            tid, side = action
+            self.tile[child] = tid
+            self.side[child] = side == "r"
+            self.avails[child] = 1
+            self.children[node][action] = child
+        return child
+
+    def action(self, node):
+        """(tile_id, side) action leading to node from its parent."""
+        return int(self.tile[node]), SIDES[self.side[node]]
+
+    def untried(self, node, actions):
+        """actions legal in the current determinization that node has no child for yet."""
+        children = self.children[node]
+        return [action for action in actions if action not in children]
+
+    def select(self, node, actions, c):
+        """Child of node with the highest UCB among those the legal actions lead to, all of them in the tree.
+
+        Each of those children counts one more availability first.
+        """
+        children = self.children[node]
+        candidates = np.array([children[action] for action in actions])
+        self.avails[candidates] += 1
+        visits = self.visits[candidates]
+        ucb = self.values[candidates] / visits
+        ucb += c * np.sqrt(np.log(self.avails[candidates]) / visits)
+        return int(candidates[ucb.argmax()])
+
+    def backpropagate(self, node, value):
+        while node >= 0:
+            self.values[node] += value
+            self.visits[node] += 1
+            node = self.parent[node]
+
+    def action_probs(self, node):
+        """visit share of each child of node, as [(prob, (tile_id, side))]."""
+        children = np.array(list(self.children[node].values()), dtype=np.int64)
+        counts = self.visits[children].astype(np.float32)
+        counts /= np.sum(counts, dtype=np.float64)
+        return [(count, self.action(child)) for count, child in zip(counts, children)]
+
+    def action_stats(self, node):
+        """visit count and value sum of each child of node, as [((tile_id, side), visits, value_sum)]."""
+        return [
+            (action, int(self.visits[child]), float(self.values[child]))
+            for action, child in self.children[node].items()
+        ]
@@ -1,154 +1,425 @@
+import logging
 import numpy as np
-import math
-
-
-class Node:
-    def __init__(
-        self,
-        game,
-        args,
-        state,
-        parent=None,
-        action_taken=None,
-    ):
-        self.game = game
-        self.parent = parent
-        self.args = args
-        self.state = state
-        self.action_taken = action_taken
-
-        self.children = []
-        self.expandable_moves = [
-            i[1]
-            for i in zip(
-                [
-                    any(condition)
-                    for condition in game.get_valid_moves(
-                        state.players[state.turn_idx], self.state.ground
-                    )
-                ],
-                state.players[state.turn_idx].hand,
-            )
-            if i[0]
-        ]
-
-        self.visit_count = 0
-        self.value_sum = 0
-
-    def is_fully_expanded(self):
-        return len(self.expandable_moves) == 0 and len(self.children) > 0
-
-    def select(self):
-        best_child = None
-        best_ucb = -np.inf
-
-        for child in self.children:
-            ucb = self.get_ucb(child)
-            if ucb > best_ucb:
-                best_child = child
-                best_ucb = ucb
-
-            return best_child
-
-    def get_ucb(self, child):
-        q_value = child.value_sum / child.visit_count
-        return q_value + self.args["C"] * math.sqrt(
-            math.log(self.visit_count) / child.visit_count
-        )
-
-    def expand(self):
-        action = np.random.choice(self.expandable_moves)
-        self.expandable_moves.remove(action)
-        child_state = self.state.copy()
-
-        child_state = self.game.get_next_state(
-            child_state, action, child_state.players[child_state.turn_idx]
-        )
-
-        ### instead of changing player(turn_idx), we keep the player, but change the state to another player state.
-        ### as every player will tend to maximize it's hand
-        # child_state = self.game.change_prespective(child_state,player=-1)
-        child_state.change_turn()
-        # play our action as player. and "rotate" the board for the opponen to play
-        child = Node(self.game, self.args, child_state, self, action)
-        self.children.append(child)
-        return child
-
-    def simulate(self):
-
-        value, is_terminal = self.game.evaluate_state(self.state)
-        if is_terminal:
-            return value
-        rollout_state = self.state.copy()
-        while True:
-            if rollout_state.turn_idx == 0:
-                rollout_state.players[0].hand += rollout_state.tiles
-            valid_moves = [
-                i[1]
-                for i in zip(
-                    [
-                        any(condition)
-                        for condition in self.game.get_valid_moves(
-                            rollout_state.players[rollout_state.turn_idx],
-                            rollout_state.ground,
-                        )
-                    ],
-                    rollout_state.players[rollout_state.turn_idx].hand,
-                )
-                if i[0]
-            ]
+import random
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ..core.batch_engine import BatchGames
+from ..core.bitboard import CompactDominoState
+from .ismcts import InfoSetTree, determinize
+from .rollout_policy import RolloutPolicy
+from .tree import Tree
+from .shared_tree import SharedTree, grow_shared
+from .telemetry import SearchTelemetry
+
+# number of striped locks guarding the node statistics of a tree-parallel search
+NUM_LOCKS = 64
+
+# iterations run between two reads of the clock by a time budgeted search
+TIME_CHECK_INTERVAL = 16
+
+# search of a parallel worker process and the locks of tree-parallel search, set up once per process by `_init_worker`
+_worker_mcts = None
+_worker_locks = None
+
+
+def _init_worker(game, args, alloc_lock, locks):
+    global _worker_mcts, _worker_locks
+    _worker_mcts = MCTS(game, dict(args, workers=1, reuse_tree=False))
+    _worker_locks = (alloc_lock, locks)
+
+
+def _search_worker(state, seed):
+    """independent search of a root-parallel worker, returns its root `Tree.action_stats` and number of iterations."""
+    _worker_mcts.rng.seed(seed)
+    root = _worker_mcts.grow(state)
+    return _worker_mcts.tree.action_stats(root), _worker_mcts.iterations
 
-            action = np.random.choice(valid_moves)
-            rollout_state = self.game.get_next_state(
-                rollout_state, action, rollout_state.players[rollout_state.turn_idx]
-            )
-            rollout_state.change_turn()
-            value, is_terminal = self.game.evaluate_state(rollout_state)
-            rollout_state.change_turn()
-            if is_terminal:
-                return value
-            rollout_state.change_turn()
 
-    def backpropagate(self, value):
-        self.value_sum += value
-        self.visit_count += 1
-        if self.parent is not None:
-            self.parent.backpropagate(value)
+def _grow_shared_worker(name, capacity, root, state, seed):
+    """share of a tree-parallel search run by a worker, on the shared tree called name. Returns its number of iterations."""
+    _worker_mcts.rng.seed(seed)
+    tree = SharedTree(capacity, *_worker_locks, name=name, rng=_worker_mcts.rng)
+    try:
+        return grow_shared(_worker_mcts, tree, root, state, _worker_mcts.args.get("virtual_loss", 1))
+    finally:
+        tree.close()
 
 
 class MCTS:
     def __init__(self, game, args):
         self.game = game
         self.args = args
+        # tree of the last search, its root and the seat it searched for, kept to be reused by the next search
+        self.tree = None
+        self.root = -1
+        self.seat = None
+        # process pool of root-parallel searches, started on first use
+        self.pool = None
+        # number of iterations the last search ran, over all its workers
+        self.iterations = 0
+        # visit count and value sum of each root action after the last search, merged over its workers,
+        # as [((tile_id, side), visits, value_sum)] like `Tree.action_stats`
+        self.root_stats = []
+        # the search draws from its own generator, seeded by the "seed" hyper parameter, so that it leaves the
+        # global one, which shuffles and deals the game, alone
+        seed = args.get("seed")
+        self.rng = random.Random(seed if isinstance(seed, int) else None)
+        # moves of the rollouts, None plays them at random
+        self.policy = None
+        if args.get("rollout_policy") == "rule_based":
+            self.policy = RolloutPolicy(args.get("rule_based", {}), args.get("rollout_epsilon", 0.1), self.rng)
+        # rule scores the priors of PUCT and progressive widening come from
+        self.scorer = None
+        if args.get("puct") or args.get("widening_c"):
+            self.scorer = RolloutPolicy(args.get("rule_based", {}), rng=self.rng)
+        # telemetry of the running search, None when it isn't collected
+        self.telemetry = None
+        # mask of the tiles the last `simulate` rollout played, for RAVE
+        self.rollout_tiles = 0
+
+    def simulate(self, state, seat):
+        """rollout from state, which is left untouched on return. Moves are random, or picked by the rule based
+        `RolloutPolicy` with the "rollout_policy" hyper parameter set to "rule_based".
+
+        With "rollout_depth" above 0, the rollout stops after that many moves and returns the
+        `DominoGame.static_evaluation` of the state reached instead.
+
+        Args:
+            state (DominoState | CompactDominoState): search state
+            seat (int): seat the value is computed for
+
+        Returns:
+            float: value of the rollout terminal (or cut off) state
+        """
+        records = []
+        self.rollout_tiles = 0
+        depth = self.args.get("rollout_depth", 0)
+        value = None
+        # moves are generated once per ply, an empty list being the terminal test of `evaluate_state`
+        while self.game.check_win(state) is None:
+            actions = self.game.get_actions(state)
+            if not actions:
+                break
+            if depth and len(records) == depth:
+                value = self.game.static_evaluation(state, seat)
+                break
+            action = self.rng.choice(actions) if self.policy is None else self.policy.choose(state, actions)
+            self.rollout_tiles |= 1 << action[0]
+            records.append(self.game.apply_move(state, action))
+        if value is None:
+            value, _ = self.game.evaluate_state(state, seat)
+
+        for record in reversed(records):
+            self.game.undo_move(state, record)
+        return value
+
+    def simulate_batch(self, state, seat, num_rollouts):
+        """num_rollouts random rollouts from state, played together by the vectorized `BatchGames` engine.
+
+        Rollouts follow the full round rules of the batch engine (draws, passes, blocked rounds) to the end of the round.
+
+        Args:
+            state (DominoState | CompactDominoState): search state, left untouched
+            seat (int): seat the value is computed for
+            num_rollouts (int): number of rollouts
+
+        Returns:
+            float: mean value of the rollouts
+        """
+        self.rollout_tiles = 0
+        if not isinstance(state, CompactDominoState):
+            state = state.compact()
+        pips, _ = BatchGames.from_state(state, num_rollouts, self.rng.getrandbits(32)).run()
+        return -pips[:, seat].mean()
+
+    def rollout(self, state, seat):
+        """value of a new leaf: a single `simulate` rollout, or the mean of "rollouts_per_leaf" batched ones."""
+        num_rollouts = self.args.get("rollouts_per_leaf", 1)
+        if num_rollouts > 1:
+            return self.simulate_batch(state, seat, num_rollouts)
+        return self.simulate(state, seat)
+
+    def budget(self, capped=False):
+        """Yields once per iteration a search may run.
+
+        Without the "time_budget_ms" hyper parameter that's "num_searches" iterations. With it, iterations go on
+        until the time budget is spent, the clock being read every `TIME_CHECK_INTERVAL` iterations, so that
+        a search always runs at least that many.
+
+        Args:
+            capped (bool, optional): stop after "num_searches" iterations even with a time budget, for searches
+                whose memory is sized from it. Defaults to False.
+        """
+        time_budget_ms = self.args.get("time_budget_ms")
+        if not time_budget_ms:
+            yield from range(self.args["num_searches"])
+            return
+        deadline = time.perf_counter() + time_budget_ms / 1000
+        iterations = 0
+        while not capped or iterations < self.args["num_searches"]:
+            for _ in range(TIME_CHECK_INTERVAL):
+                yield iterations
+                iterations += 1
+                if capped and iterations == self.args["num_searches"]:
+                    return
+            if time.perf_counter() >= deadline:
+                return
+
+    def search(self, state, return_telemetry=False):
+        """Searches from state for the seat to move, with the hyper parameters of `self.args`.
+
+        The search is sequential (`grow`), information set (`grow_ismcts`, "ismcts"), or parallel over "workers"
+        processes (`search_parallel`, `search_tree_parallel`). Its iteration count is kept in `self.iterations`, its
+        root statistics in `self.root_stats`, and its `SearchTelemetry`, when collected, in `self.telemetry`.
+
+        Args:
+            state (DominoState | CompactDominoState): root state. It's modified during search, but restored before returning.
+            return_telemetry (bool, optional): collect and return the telemetry of the search, as the "telemetry" hyper
+                parameter does without returning it. Defaults to False.
+
+        Returns:
+            List[Tuple[float,Tuple[int,str]]]: visit share of each root action
+            SearchTelemetry: telemetry of the search, if return_telemetry
+        """
+        self.telemetry = SearchTelemetry() if return_telemetry or self.args.get("telemetry") else None
+        # parallel searches leave no tree behind, they set self.root_stats themselves
+        tree = None
+        if self.args.get("workers", 1) > 1 and not self.args.get("ismcts"):
+            if self.args.get("parallel") == "tree":
+                probs = self.search_tree_parallel(state)
+            else:
+                probs = self.search_parallel(state)
+        else:
+            root = self.grow_ismcts(state) if self.args.get("ismcts") else self.grow(state)
+            tree = self.tree
+            probs = tree.action_probs(root)
+            self.root_stats = tree.action_stats(root)
+        logging.debug(f"MCTS: {self.iterations} iterations")
+        if self.telemetry is not None:
+            self.telemetry.finish(tree, self.root_stats, self.iterations)
+        return (probs, self.telemetry) if return_telemetry else probs
+
+    def search_parallel(self, state):
+        """Root-parallel search: each worker process grows an independent tree from state with its own seed,
+        running "num_searches" iterations. Visit counts of the root actions are then summed over the workers, the most
+        visited action being the most robust choice across trees.
+        Trees aren't reused between searches in this mode.
+
+        Args:
+            state (DominoState | CompactDominoState): root state, left untouched
+
+        Value sums are summed as well, the merged statistics are kept in `self.root_stats`.
+
+        Returns:
+            List[Tuple[float,Tuple[int,str]]]: merged visit share of each root action
+        """
+        workers = self.args["workers"]
+        seeds = [self.rng.getrandbits(32) for _ in range(workers)]
+        merged = {}
+        self.iterations = 0
+        for stats, iterations in self.get_pool().map(_search_worker, [state] * workers, seeds):
+            self.iterations += iterations
+            for action, count, value_sum in stats:
+                visits, values = merged.get(action, (0, 0.0))
+                merged[action] = visits + count, values + value_sum
+        self.root_stats = [(action, visits, value_sum) for action, (visits, value_sum) in merged.items()]
+        total = sum(visits for _, visits, _ in self.root_stats)
+        return [(np.float32(visits / total), action) for action, visits, _ in self.root_stats]
+
+    def search_tree_parallel(self, state):
+        """Tree-parallel search: worker processes grow one tree, held in shared memory (see `SharedTree`),
+        each running "num_searches" iterations with its own seed. A worker adds a virtual loss ("virtual_loss"
+        hyper parameter, in value units) to every node it walks through until its rollout comes back, which spreads
+        workers over different branches. Trees aren't reused between searches and positions aren't merged
+        through the transposition table in this mode.
+
+        The shared tree can't grow, it's sized for "num_searches" iterations per worker, which also caps the
+        iterations of a time budgeted search in this mode.
+
+        Args:
+            state (DominoState | CompactDominoState): root state, left untouched
+
+        Returns:
+            List[Tuple[float,Tuple[int,str]]]: visit share of each root action
+        """
+        workers = self.args["workers"]
+        # every iteration expands at most one node, allocating the block of its children. Draws aren't part of
+        # the tree, hands only shrink below the root, so no block is larger than the largest hand's placements.
+        if isinstance(state, CompactDominoState):
+            largest_hand = max(hand.bit_count() for hand in state.hands)
+        else:
+            largest_hand = max(len(player.hand) for player in state.players)
+        capacity = workers * self.args["num_searches"] * 2 * largest_hand + 1
+        pool = self.get_pool()
+        tree = SharedTree(capacity, self.alloc_lock, self.locks, rng=self.rng)
         try:
-            np.random.seed(args["seed"])
-        except:
-            pass
+            root = tree.add_root(self.game.get_state_key(state))
+            seeds = [self.rng.getrandbits(32) for _ in range(workers)]
+            self.iterations = sum(
+                pool.map(
+                    _grow_shared_worker,
+                    [tree.name] * workers,
+                    [capacity] * workers,
+                    [root] * workers,
+                    [state] * workers,
+                    seeds,
+                )
+            )
+            self.root_stats = tree.action_stats(root)
+            return tree.action_probs(root)
+        finally:
+            tree.close()
+
+    def get_pool(self):
+        """process pool of parallel searches, started on first use."""
+        if self.pool is None:
+            self.alloc_lock = multiprocessing.Lock()
+            self.locks = [multiprocessing.Lock() for _ in range(NUM_LOCKS)]
+            self.pool = ProcessPoolExecutor(
+                self.args["workers"],
+                initializer=_init_worker,
+                initargs=(self.game, self.args, self.alloc_lock, self.locks),
+            )
+        return self.pool
+
+    def close(self):
+        """shuts the worker processes of parallel search down."""
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def grow(self, state):
+        """Runs the iterations of `budget` on the tree of the search, walking the single root state down the tree and
+        back up with make/unmake moves.
+
+        Positions reached through different move orders share their statistics in a transposition table of
+        "tt_size" rows, expanding into an already visited position reuses its mean value instead of a rollout.
+        With "reuse_tree", a search for the same seat carries on from the subtree of the moves played since the
+        last one, when they're in the tree (see `Tree.find`), otherwise from a fresh root. The tree is then compacted to
+        that subtree, dropping the nodes above and beside it.
+
+        Selection is `Tree.select`, blending in RAVE statistics with "rave_k" (batched rollouts don't feed them) and
+        using PUCT priors with "puct". With "widening_c" (progressive widening), children are tried by decreasing
+        prior, a node getting widening_c * visits ** "widening_alpha" of them. With "max_nodes", the tree is
+        pruned back to half of it (see `Tree.prune`) whenever an iteration starts with max_nodes nodes or more, so
+        each iteration may still add one child block over the bound.
 
-    def search(self, state):
-        root = Node(self.game, self.args, state)
-        for _ in range(self.args["num_searches"]):
+        Returns:
+            int: index of the root node in `self.tree`
+        """
+        seat = state.turn_idx
+        key = self.game.get_state_key(state)
+        root = -1
+        if self.args.get("reuse_tree") and self.tree is not None and self.seat == seat:
+            # the seat's own move and one move per opponent were played since
+            root = self.tree.find(self.root, key, self.game.num_players)
+        if root < 0:
+            self.tree = Tree(table_size=self.args.get("tt_size", 0), rng=self.rng)
+            root = self.tree.add_root(key)
+        else:
+            # the subtree becomes the whole tree, renumbered from 0, the rest of it is freed
+            root = self.tree.prune(root, len(self.tree))
+        self.root, self.seat = root, seat
+        tree = self.tree
+        max_nodes = self.args.get("max_nodes", 0)
+        rave_k = self.args.get("rave_k", 0)
+        puct = self.args.get("puct", False)
+        widening_c = self.args.get("widening_c", 0)
+        widening_alpha = self.args.get("widening_alpha", 0.5)
+        telemetry = self.telemetry
+        self.iterations = 0
+        for _ in self.budget():
+            self.iterations += 1
+            if telemetry is not None:
+                clock = time.perf_counter()
+            if max_nodes and len(tree) >= max_nodes:
+                root = self.root = tree.prune(root, max_nodes // 2)
             node = root
+            records = []
+            self.rollout_tiles = 0
             # selection
-            while node.is_fully_expanded():
-                node = node.select()
-            value, is_terminal = self.game.evaluate_state(node.state)
-            # value = self.game.get_opponent_value(
-            #     value
-            # )  ##because children are always opponen moves
-            if not is_terminal:
+            while tree.is_fully_expanded(node) or (widening_c and tree.is_widened(node, widening_c, widening_alpha)):
+                node = tree.select(node, self.args["C"], rave_k, puct)
+                records.append(self.game.apply_move(state, tree.action(node)))
+            value, is_terminal = self.game.evaluate_state(state, seat)
+            if telemetry is not None:
+                clock = telemetry.lap("selection", clock)
+            if not is_terminal and self.game.check_win(state) is None:
                 # expansion
-                node = node.expand()
-                # simulation
-                value = node.simulate()
+                if tree.num_children[node] < 0:
+                    actions = self.game.get_actions(state)
+                    priors = None
+                    if self.scorer is not None:
+                        priors = self.scorer.priors(state, actions, self.args.get("prior_temperature", 5))
+                    tree.add_children(node, actions, priors)
+                node = tree.next_unexpanded(node)
+                records.append(self.game.apply_move(state, tree.action(node)))
+                tree.attach(node, self.game.get_state_key(state))
+                if telemetry is not None:
+                    clock = telemetry.lap("expansion", clock)
+                # simulation, unless the position was reached before through another move order
+                if tree.visit_count(node):
+                    value = tree.value_sum(node) / tree.visit_count(node)
+                else:
+                    value = self.rollout(state, seat)
+                    if telemetry is not None:
+                        telemetry.rollouts += 1
+                if telemetry is not None:
+                    clock = telemetry.lap("simulation", clock)
             # backpropagation
-            node.backpropagate(value)
-
-        counts = np.array(
-            [child.visit_count for child in root.children], dtype=np.float32
-        )
-        sum_visits = np.sum(counts, dtype=np.float64)
-        counts /= sum_visits
-        actions = [child.action_taken for child in root.children]
-        action_probs = [i for i in zip(counts, actions)]
-        return action_probs
+            tree.backpropagate(node, value)
+            if rave_k:
+                tree.backpropagate_amaf(node, value, self.rollout_tiles)
+            if telemetry is not None:
+                telemetry.add_depth(len(records))
+            for record in reversed(records):
+                self.game.undo_move(state, record)
+            if telemetry is not None:
+                telemetry.lap("backpropagation", clock)
+
+        return root
+
+    def grow_ismcts(self, state):
+        """Single-observer information set MCTS, searching for the seat to move without looking at hidden tiles.
+
+        Each iteration samples a determinization of state (see `determinize`): the opponents' hands and the
+        boneyard are dealt again out of the tiles the seat can't see. The iteration then walks that determinization
+        down one `InfoSetTree`, shared by all of them, only taking actions legal in it. Statistics of a node thus
+        pool every hidden deal consistent with the seat's observations, for the cost of a single tree. The search
+        is sequential whatever "workers", and its tree isn't reused.
+
+        Returns:
+            int: index of the root node in `self.tree`
+        """
+        seat = state.turn_idx
+        if not isinstance(state, CompactDominoState):
+            state = state.compact()
+        self.tree = tree = InfoSetTree()
+        self.root, self.seat = tree.add_root(), None
+        self.iterations = 0
+        for _ in self.budget():
+            self.iterations += 1
+            world = determinize(state, seat, self.rng)
+            node = self.root
+            # selection, while every action legal in this determinization has a child
+            while True:
+                value, is_terminal = self.game.evaluate_state(world, seat)
+                if is_terminal or self.game.check_win(world) is not None:
+                    break
+                actions = self.game.get_actions(world)
+                untried = tree.untried(node, actions)
+                if untried:
+                    # expansion and simulation
+                    action = self.rng.choice(untried)
+                    node = tree.add_child(node, action)
+                    self.game.apply_move(world, action)
+                    value = self.rollout(world, seat)
+                    break
+                node = tree.select(node, actions, self.args["C"])
+                self.game.apply_move(world, tree.action(node))
+            # backpropagation
+            tree.backpropagate(node, value)
+
+        return self.root
@@ -0,0 +1,76 @@
+import math
+import random
+
+from ..core.bitboard import EMPTY_END, PIP_MASKS, TILES, TILE_PIPS, CompactDominoState, hand_to_mask
+
+
+class RolloutPolicy:
+    """Epsilon-greedy rollout policy scoring moves with the `RuleBasedStrategy` rules.
+
+    A move placing a tile on an end scores its tile value (times the double bonus for doubles), plus the tiles in
+    hand showing the pip it leaves open (versatility), minus the played tiles showing that pip (safety). Tile values
+    are looked up in a table computed once, pip frequencies are popcounts of the hand and played masks, so a step
+    costs a few integer operations per legal move. The blocking rule needs a memory of the opponents, rollouts
+    don't have one. MCTS also turns the scores into move priors, see `priors`.
+
+    Args:
+        weights (Dict[str,float]): "tile_value", "double_tiles", "tiles_in_hand" and "tiles_in_ground" weights of the rules
+        epsilon (float, optional): share of moves picked at random instead. Defaults to 0.1.
+        rng (random.Random, optional): generator of the random picks. Defaults to None, which makes one.
+    """
+
+    def __init__(self, weights, epsilon=0.1, rng=None):
+        self.epsilon = epsilon
+        self.rng = random.Random() if rng is None else rng
+        self.tiles_in_hand = weights.get("tiles_in_hand", 1)
+        self.tiles_in_ground = weights.get("tiles_in_ground", 1)
+        # value score of each tile id
+        self.tile_scores = [
+            pips * weights.get("tile_value", 1) * (weights.get("double_tiles", 1) if a == b else 1)
+            for (a, b), pips in zip(TILES, TILE_PIPS)
+        ]
+
+    def choose(self, state, actions):
+        """picks one of the legal actions of the player with the turn.
+
+        Args:
+            state (DominoState | CompactDominoState): current state
+            actions (List[Tuple[int,str]]): legal (tile_id, side) actions, at least one
+
+        Returns:
+            Tuple[int,str]: chosen action
+        """
+        if self.rng.random() < self.epsilon:
+            return self.rng.choice(actions)
+        scores = self.scores(state, actions)
+        return actions[scores.index(max(scores))]
+
+    def priors(self, state, actions, temperature):
+        """move probabilities of the legal actions, a softmax of their rule scores at temperature (in score units)."""
+        scores = self.scores(state, actions)
+        top = max(scores)
+        weights = [math.exp((score - top) / temperature) for score in scores]
+        total = sum(weights)
+        return [weight / total for weight in weights]
+
+    def scores(self, state, actions):
+        """rule score of each of the legal actions of the player with the turn."""
+        if isinstance(state, CompactDominoState):
+            hand, played, left, right = state.hands[state.turn_idx], state.played, state.left, state.right
+        else:
+            hand, played = hand_to_mask(state.players[state.turn_idx].hand), hand_to_mask(state.ground)
+            left, right = (state.ground[0].left, state.ground[-1].right) if state.ground else (EMPTY_END, EMPTY_END)
+
+        scores = []
+        for tid, side in actions:
+            score = self.tile_scores[tid]
+            if left != EMPTY_END:
+                # pip left open once the tile is placed
+                a, b = TILES[tid]
+                open_pip = a + b - (left if side == "l" else right)
+                score += (
+                    (hand & PIP_MASKS[open_pip]).bit_count() * self.tiles_in_hand
+                    - (played & PIP_MASKS[open_pip]).bit_count() * self.tiles_in_ground
+                )
+            scores.append(score)
+        return scores
@@ -0,0 +1,194 @@
+import random
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .tree import Tree
+
+# (name, dtype) of the arrays a SharedTree lays out in its shared memory block, after a one int64 header
+FIELDS = (
+    ("parent", np.int32),
+    ("tile", np.int8),
+    ("side", np.int8),
+    ("first_child", np.int32),
+    ("num_children", np.int16),
+    ("num_expanded", np.int16),
+    ("visits", np.int64),
+    ("values", np.float64),
+)
+
+
+def block_size(capacity):
+    """bytes of shared memory a SharedTree of capacity nodes takes, each array aligned on 8 bytes."""
+    size = 8
+    for _, dtype in FIELDS:
+        size += -(-capacity * np.dtype(dtype).itemsize // 8) * 8
+    return size
+
+
+class SharedTree(Tree):
+    """`Tree` whose arrays live in a `multiprocessing.shared_memory` block, for tree-parallel search.
+
+    Every worker process attaches to the block by name and works on the same nodes. The capacity is fixed,
+    expanding a node whose children don't fit raises a RuntimeError. Nodes don't share statistics
+    through a transposition table, each node's statistics row is the node itself.
+
+    Writes go through locks: alloc_lock guards the allocation of child blocks and the expansion of children,
+    locks is a list of striped locks guarding the statistics of nodes, node n being guarded by locks[n % len(locks)].
+
+    Args:
+        capacity (int): number of nodes
+        alloc_lock (multiprocessing.Lock): lock of node allocation
+        locks (List[multiprocessing.Lock]): striped locks of node statistics
+        name (str, optional): name of an existing block to attach to. Defaults to None, which creates one.
+        rng (random.Random, optional): generator shuffling the children. Defaults to None, which makes one.
+    """
+
+    def __init__(self, capacity, alloc_lock, locks, name=None, rng=None):
+        self.created = name is None
+        if self.created:
+            self.shm = shared_memory.SharedMemory(create=True, size=block_size(capacity))
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.capacity = capacity
+        self.alloc_lock = alloc_lock
+        self.locks = locks
+
+        self.header = np.ndarray(1, dtype=np.int64, buffer=self.shm.buf)
+        offset = 8
+        for field, dtype in FIELDS:
+            setattr(self, field, np.ndarray(capacity, dtype=dtype, buffer=self.shm.buf, offset=offset))
+            offset += -(-capacity * np.dtype(dtype).itemsize // 8) * 8
+        if self.created:
+            self.header[0] = 0
+            self.parent[:] = -1
+            self.num_children[:] = -1
+            self.num_expanded[:] = 0
+            self.visits[:] = 0
+            self.values[:] = 0
+
+        # statistics aren't shared between nodes, so the statistics row of a node is its own index
+        self.stat = np.arange(capacity, dtype=np.int32)
+        self.key = np.zeros(capacity, dtype=np.uint64)
+        self.table_size = 0
+        self.table = {}
+        self.rng = random.Random() if rng is None else rng
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def size(self):
+        return int(self.header[0])
+
+    @size.setter
+    def size(self, size):
+        self.header[0] = size
+
+    def close(self):
+        """detaches from the block, and frees it when this is the process that created it."""
+        # drop the views on the block first, it can't be closed while they're alive
+        for field, _ in FIELDS:
+            setattr(self, field, None)
+        self.header = None
+        self.shm.close()
+        if self.created:
+            self.shm.unlink()
+
+    def attach(self, node, key):
+        self.key[node] = key
+
+    def expand(self, node, actions, virtual_loss):
+        """Picks the next untried child of node, generating the children first if need be, and adds a virtual loss to it.
+
+        Another worker may have expanded the last untried child in the meantime, the caller then selects among
+        the children instead.
+
+        Args:
+            node (int): node to expand
+            actions (List[Tuple[int,str]]): legal actions at node
+            virtual_loss (float): value subtracted from the child until the rollout comes back
+
+        Returns:
+            int: child to carry on with, -1 when no child is left untried
+
+        Raises:
+            RuntimeError: the children of node don't fit in the tree
+        """
+        with self.alloc_lock:
+            if self.num_children[node] < 0:
+                if self.size + len(actions) > self.capacity:
+                    raise RuntimeError(f"shared tree is full, {self.size} of {self.capacity} nodes are used")
+                self.add_children(node, actions)
+            if self.num_expanded[node] < self.num_children[node]:
+                child = self.first_child[node] + self.num_expanded[node]
+                # selection in other workers reads without locks: the child is visited before it's seen expanded
+                self.add_virtual_loss(child, virtual_loss)
+                self.num_expanded[node] += 1
+                return child
+        return -1
+
+    def add_virtual_loss(self, node, virtual_loss):
+        """counts a visit in progress on node, with a pessimistic value, so other workers avoid it meanwhile."""
+        with self.locks[node % len(self.locks)]:
+            self.visits[node] += 1
+            self.values[node] -= virtual_loss
+
+    def backpropagate_path(self, path, value, virtual_loss):
+        """replaces the virtual losses added along path by the rollout value, the visits being already counted."""
+        for node in path:
+            with self.locks[node % len(self.locks)]:
+                self.values[node] += value + virtual_loss
+
+
+def grow_shared(mcts, tree, root, state, virtual_loss):
+    """Runs the tree-parallel iterations of a worker on a shared tree, as many as `MCTS.budget` allows, capped
+    by "num_searches" that the tree is sized from.
+
+    Every node the worker walks through, root included, gets a virtual loss right away, so concurrent workers
+    are steered to other branches. It's swapped for the rollout value on backpropagation.
+
+    Args:
+        mcts (MCTS): search of the worker, for its game, hyper parameters and rollouts
+        tree (SharedTree): shared tree
+        root (int): root node
+        state (DominoState | CompactDominoState): root state, modified during search but restored before returning
+        virtual_loss (float): value of a virtual loss
+
+    Returns:
+        int: number of iterations run
+    """
+    game = mcts.game
+    seat = state.turn_idx
+    iterations = 0
+    for _ in mcts.budget(capped=True):
+        iterations += 1
+        node = root
+        tree.add_virtual_loss(node, virtual_loss)
+        path = [node]
+        records = []
+        # selection
+        while tree.is_fully_expanded(node):
+            node = tree.select(node, mcts.args["C"])
+            tree.add_virtual_loss(node, virtual_loss)
+            path.append(node)
+            records.append(game.apply_move(state, tree.action(node)))
+        value, is_terminal = game.evaluate_state(state, seat)
+        if not is_terminal and game.check_win(state) is None:
+            # expansion, unless another worker took the last untried child
+            child = tree.expand(node, game.get_actions(state), virtual_loss)
+            if child < 0 and tree.is_fully_expanded(node):
+                child = tree.select(node, mcts.args["C"])
+                tree.add_virtual_loss(child, virtual_loss)
+            if child >= 0:
+                node = child
+                path.append(node)
+                records.append(game.apply_move(state, tree.action(node)))
+            # simulation
+            value = mcts.rollout(state, seat)
+        # backpropagation
+        tree.backpropagate_path(path, value, virtual_loss)
+        for record in reversed(records):
+            game.undo_move(state, record)
+    return iterations
@@ -0,0 +1,80 @@
+import json
+import time
+
+import numpy as np
+
+# phases of an MCTS iteration, timed separately
+PHASES = ("selection", "expansion", "simulation", "backpropagation")
+
+
+class SearchTelemetry:
+    """Counters and timers of one MCTS search.
+
+    Phase times are only collected by the sequential search. Parallel and ISMCTS searches report the iteration
+    count, the elapsed time, the root visits and the tree they end with, if any.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.times = dict.fromkeys(PHASES, 0.0)
+        self.rollouts = 0
+        self.depth_sum = 0
+        self.max_depth = 0
+        self.iterations = 0
+        self.elapsed = 0.0
+        self.nodes = 0
+        self.branching = 0.0
+        self.root_visits = []
+
+    def lap(self, phase, since):
+        """adds the time elapsed since the since clock reading to phase, and returns the current reading."""
+        now = time.perf_counter()
+        self.times[phase] += now - since
+        return now
+
+    def add_depth(self, depth):
+        """counts the depth below the root at which an iteration left the tree."""
+        self.depth_sum += depth
+        self.max_depth = max(self.max_depth, depth)
+
+    def finish(self, tree, root_stats, iterations):
+        """Records the root visits, and the size and shape of the tree a search ended with.
+
+        Args:
+            tree (Tree | InfoSetTree | None): tree of the search, None when it's gone (parallel searches)
+            root_stats (List[Tuple[Tuple[int,str],int,float]]): visit count and value sum of each root action, see `Tree.action_stats`
+            iterations (int): number of iterations the search ran
+        """
+        self.elapsed = time.perf_counter() - self.start
+        self.iterations = iterations
+        self.root_visits = [
+            {"tile": tid, "side": side, "visits": visits, "value": value_sum / visits if visits else 0.0}
+            for (tid, side), visits, value_sum in root_stats
+        ]
+        if tree is None:
+            return
+        self.nodes = len(tree)
+        if hasattr(tree, "num_children"):
+            generated = tree.num_children[: len(tree)]
+            generated = generated[generated > 0]
+            self.branching = float(generated.mean()) if generated.size else 0.0
+        else:
+            self.branching = float(np.mean([len(children) for children in tree.children if children] or [0]))
+
+    def to_dict(self):
+        """the telemetry as a dict of plain python values."""
+        return {
+            "iterations": self.iterations,
+            "elapsed": self.elapsed,
+            "iterations_per_second": self.iterations / self.elapsed if self.elapsed else 0.0,
+            "times": dict(self.times),
+            "rollouts": self.rollouts,
+            "max_depth": self.max_depth,
+            "mean_depth": self.depth_sum / self.iterations if self.iterations and self.depth_sum else 0.0,
+            "nodes": self.nodes,
+            "branching": self.branching,
+            "root_visits": self.root_visits,
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
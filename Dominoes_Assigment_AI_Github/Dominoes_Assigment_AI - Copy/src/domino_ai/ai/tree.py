@@ -0,0 +1,322 @@
+import heapq
+import math
+import random
+
+import numpy as np
+
+from ..core.bitboard import TILES, iter_ids
+
+# side of an action, as stored in `Tree.side`
+SIDES = ("l", "r")
+
+# (name, fill value) of the per node arrays of a `Tree`
+NODE_FIELDS = (
+    ("parent", -1),
+    ("tile", 0),
+    ("side", 0),
+    ("first_child", 0),
+    ("num_children", -1),
+    ("num_expanded", 0),
+    ("stat", -1),
+    ("key", 0),
+    ("amaf_visits", 0),
+    ("amaf_values", 0),
+    ("prior", 0),
+)
+
+
+class Tree:
+    """Struct-of-arrays search tree.
+
+    Nodes are indices into preallocated NumPy arrays, grown by doubling when full. The children of a node are
+    allocated together when it's first expanded, as the block first_child[n] to first_child[n] + num_children[n],
+    and tried one by one in a random order, or by decreasing prior when they have priors: the first num_expanded[n]
+    of them are in the tree proper.
+
+    Visit and value statistics live in their own arrays, that stat[n] indexes. When a transposition table is
+    enabled (table_size > 0), nodes reaching the same position (same Zobrist key) share one statistics row.
+    Once table_size positions are stored, further positions get rows of their own that aren't shared.
+
+    For RAVE, every node also keeps all-moves-as-first (AMAF) statistics of its tile at its parent: the values of
+    the iterations through the parent that played the tile later on, whenever it was.
+
+    Args:
+        capacity (int, optional): number of nodes (and statistics rows) allocated up front. Defaults to 1024.
+        table_size (int, optional): bound of the transposition table, 0 disables it. Defaults to 0.
+        rng (random.Random, optional): generator shuffling the children. Defaults to None, which makes one.
+    """
+
+    def __init__(self, capacity=1024, table_size=0, rng=None):
+        self.parent = np.full(capacity, -1, dtype=np.int32)
+        self.tile = np.zeros(capacity, dtype=np.int8)
+        self.side = np.zeros(capacity, dtype=np.int8)
+        self.first_child = np.zeros(capacity, dtype=np.int32)
+        # -1 until the children of the node are generated
+        self.num_children = np.full(capacity, -1, dtype=np.int16)
+        self.num_expanded = np.zeros(capacity, dtype=np.int16)
+        self.stat = np.full(capacity, -1, dtype=np.int32)
+        self.key = np.zeros(capacity, dtype=np.uint64)
+        self.amaf_visits = np.zeros(capacity, dtype=np.int64)
+        self.amaf_values = np.zeros(capacity, dtype=np.float64)
+        # probability of the action of each node among its siblings, for PUCT and progressive widening
+        self.prior = np.zeros(capacity, dtype=np.float32)
+        self.size = 0
+
+        self.visits = np.zeros(capacity, dtype=np.int64)
+        self.values = np.zeros(capacity, dtype=np.float64)
+        self.num_stats = 0
+
+        self.table_size = table_size
+        self.table = {}
+        self.rng = random.Random() if rng is None else rng
+
+    def __len__(self):
+        return self.size
+
+    def _grow_nodes(self, size):
+        capacity = len(self.parent)
+        while capacity < size:
+            capacity *= 2
+        for name, fill in NODE_FIELDS:
+            old = getattr(self, name)
+            new = np.full(capacity, fill, dtype=old.dtype)
+            new[: len(old)] = old
+            setattr(self, name, new)
+
+    def _new_stats(self):
+        if self.num_stats == len(self.visits):
+            self.visits = np.concatenate([self.visits, np.zeros_like(self.visits)])
+            self.values = np.concatenate([self.values, np.zeros_like(self.values)])
+        self.num_stats += 1
+        return self.num_stats - 1
+
+    def add_root(self, key):
+        """adds a parentless node for the position with Zobrist key, and returns its index."""
+        if self.size == len(self.parent):
+            self._grow_nodes(self.size + 1)
+        node = self.size
+        self.size += 1
+        self.attach(node, key)
+        return node
+
+    def attach(self, node, key):
+        """gives node the statistics row of its position, shared through the transposition table if enabled."""
+        self.key[node] = key
+        if not self.table_size:
+            self.stat[node] = self._new_stats()
+            return
+        stat = self.table.get(key)
+        if stat is None:
+            stat = self._new_stats()
+            if len(self.table) < self.table_size:
+                self.table[key] = stat
+        self.stat[node] = stat
+
+    def add_children(self, node, actions, priors=None):
+        """Allocates the child block of node, one child per (tile_id, side) action, in a random order.
+
+        Args:
+            node (int): node to generate the children of
+            actions (List[Tuple[int,str]]): legal actions at node
+            priors (List[float], optional): prior of each action. Children are then ordered by decreasing prior,
+                ties in a random order. Defaults to None.
+        """
+        actions = list(actions)
+        order = list(range(len(actions)))
+        self.rng.shuffle(order)
+        if priors is not None:
+            order.sort(key=lambda i: -priors[i])
+        actions = [actions[i] for i in order]
+        first = self.size
+        if first + len(actions) > len(self.parent):
+            self._grow_nodes(first + len(actions))
+        block = slice(first, first + len(actions))
+        self.parent[block] = node
+        self.tile[block] = [tid for tid, _ in actions]
+        self.side[block] = [side == "r" for _, side in actions]
+        if priors is not None:
+            self.prior[block] = [priors[i] for i in order]
+        self.first_child[node] = first
+        self.num_children[node] = len(actions)
+        self.size += len(actions)
+
+    def action(self, node):
+        """(tile_id, side) action leading to node from its parent."""
+        return int(self.tile[node]), SIDES[self.side[node]]
+
+    def children(self, node):
+        first = self.first_child[node]
+        return np.arange(first, first + self.num_expanded[node])
+
+    def is_fully_expanded(self, node):
+        return 0 < self.num_children[node] == self.num_expanded[node]
+
+    def is_widened(self, node, widening_c, widening_alpha):
+        """Progressive widening: whether node has all the children its visits allow, widening_c * visits ** widening_alpha.
+
+        Children being tried by decreasing prior, unlikely actions only enter the tree once node is well visited.
+        """
+        return (
+            self.num_children[node] > 0
+            and self.num_expanded[node] > 0
+            and self.num_expanded[node] >= widening_c * self.visits[self.stat[node]] ** widening_alpha
+        )
+
+    def next_unexpanded(self, node):
+        """moves the next untried child of node into the tree, and returns it."""
+        child = self.first_child[node] + self.num_expanded[node]
+        self.num_expanded[node] += 1
+        return child
+
+    def prune(self, root, max_nodes):
+        """Shrinks the tree to the subtree of root, keeping at most max_nodes of its nodes, and renumbers them.
+
+        Child blocks are kept whole, most visited parents first, so the least visited subtrees are dropped. A kept
+        node whose children are dropped keeps its statistics, its children are generated again on its next
+        expansion. Statistics rows no kept node uses are freed, and the transposition table forgets them.
+        The children of root are always kept, even over the bound, so the root statistics survive pruning.
+
+        Args:
+            root (int): node to keep the subtree of
+            max_nodes (int): bound of the number of nodes kept below the children of root
+
+        Returns:
+            int: index of root after pruning, always 0
+        """
+        keep = [root]
+        # parents whose child block is kept
+        parents = []
+        heap = [(-self.visit_count(root), root)] if self.num_children[root] > 0 else []
+        while heap:
+            _, node = heapq.heappop(heap)
+            first, num_children = self.first_child[node], self.num_children[node]
+            if node != root and len(keep) + num_children > max_nodes:
+                continue
+            parents.append(node)
+            keep.extend(range(first, first + num_children))
+            for child in range(first, first + self.num_expanded[node]):
+                if self.num_children[child] > 0:
+                    heapq.heappush(heap, (-self.visit_count(child), child))
+
+        keep = np.array(keep)
+        remap = np.full(self.size, -1, dtype=np.int32)
+        remap[keep] = np.arange(len(keep))
+        has_block = np.zeros(self.size, dtype=bool)
+        has_block[parents] = True
+        has_block = has_block[keep]
+        stats = np.unique(self.stat[keep][self.stat[keep] >= 0])
+        stat_remap = np.full(self.num_stats, -1, dtype=np.int32)
+        stat_remap[stats] = np.arange(len(stats))
+
+        for name, fill in NODE_FIELDS:
+            old = getattr(self, name)
+            new = np.full(len(old), fill, dtype=old.dtype)
+            new[: len(keep)] = old[keep]
+            setattr(self, name, new)
+        self.size = len(keep)
+        self.parent[0] = -1
+        self.parent[1 : self.size] = remap[self.parent[1 : self.size]]
+        self.first_child[: self.size] = np.where(has_block, remap[self.first_child[: self.size]], 0)
+        self.num_children[: self.size][~has_block] = -1
+        self.num_expanded[: self.size][~has_block] = 0
+        stat = self.stat[: self.size]
+        stat[stat >= 0] = stat_remap[stat[stat >= 0]]
+
+        self.visits[: len(stats)] = self.visits[stats]
+        self.values[: len(stats)] = self.values[stats]
+        self.visits[len(stats) :] = 0
+        self.values[len(stats) :] = 0
+        self.num_stats = len(stats)
+        self.table = {key: int(stat_remap[row]) for key, row in self.table.items() if stat_remap[row] >= 0}
+        return 0
+
+    def find(self, node, key, depth):
+        """looks for the position with Zobrist key among node and its expanded descendants, at most depth plies below it.
+
+        Returns:
+            int: index of the first node found, breadth first, -1 when the position isn't in the tree
+        """
+        key = np.uint64(key)
+        frontier = np.array([node])
+        for _ in range(depth + 1):
+            hits = frontier[self.key[frontier] == key]
+            if hits.size:
+                return int(hits[0])
+            frontier = np.concatenate([self.children(n) for n in frontier] + [np.array([], dtype=np.int64)])
+            if not frontier.size:
+                break
+        return -1
+
+    def visit_count(self, node):
+        return self.visits[self.stat[node]]
+
+    def value_sum(self, node):
+        return self.values[self.stat[node]]
+
+    def select(self, node, c, rave_k=0, puct=False):
+        """Child of a fully expanded node with the highest UCB, computed over all its children at once.
+
+        With rave_k above 0 (RAVE), the mean value of a child is blended with its AMAF mean value, with a weight
+        sqrt(rave_k / (3 * visits + rave_k)) decaying as the child gets visits of its own.
+
+        With puct, the exploration term is the PUCT one, c * prior * sqrt(parent visits) / (1 + visits), steering
+        visits to the children with the highest priors.
+        """
+        first = self.first_child[node]
+        stats = self.stat[first : first + self.num_expanded[node]]
+        visits = self.visits[stats]
+        ucb = self.values[stats] / visits
+        if rave_k:
+            block = slice(first, first + self.num_expanded[node])
+            amaf_visits = self.amaf_visits[block]
+            beta = np.sqrt(rave_k / (3 * visits + rave_k)) * (amaf_visits > 0)
+            ucb += beta * (self.amaf_values[block] / np.maximum(amaf_visits, 1) - ucb)
+        if puct:
+            block = slice(first, first + self.num_expanded[node])
+            ucb += c * self.prior[block] * math.sqrt(self.visits[self.stat[node]]) / (1 + visits)
+        else:
+            ucb += c * np.sqrt(math.log(self.visits[self.stat[node]]) / visits)
+        return first + ucb.argmax()
+
+    def backpropagate(self, node, value):
+        while node >= 0:
+            stat = self.stat[node]
+            self.values[stat] += value
+            self.visits[stat] += 1
+            node = self.parent[node]
+
+    def backpropagate_amaf(self, node, value, played):
+        """Updates the AMAF statistics of an iteration that reached node, then played the tiles of played.
+
+        Walking up from node, every expanded child of an ancestor whose tile was played after that ancestor,
+        in the tree or the rollout, counts the iteration.
+
+        Args:
+            node (int): last node of the iteration in the tree
+            value (float): value of the iteration
+            played (int): mask of the tiles the rollout played
+        """
+        later = np.zeros(len(TILES), dtype=bool)
+        later[list(iter_ids(played))] = True
+        while node >= 0:
+            first = self.first_child[node]
+            children = np.arange(first, first + self.num_expanded[node])
+            children = children[later[self.tile[children]]]
+            self.amaf_visits[children] += 1
+            self.amaf_values[children] += value
+            later[self.tile[node]] = True
+            node = self.parent[node]
+
+    def action_probs(self, node):
+        """visit share of each expanded child of node, as [(prob, (tile_id, side))]."""
+        children = self.children(node)
+        counts = self.visits[self.stat[children]].astype(np.float32)
+        counts /= np.sum(counts, dtype=np.float64)
+        return [(count, self.action(child)) for count, child in zip(counts, children)]
+
+    def action_stats(self, node):
+        """visit count and value sum of each expanded child of node, as [((tile_id, side), visits, value_sum)]."""
+        return [
+            (self.action(child), int(self.visit_count(child)), float(self.value_sum(child)))
+            for child in self.children(node)
+        ]
@@ -0,0 +1,342 @@
+import argparse
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from .bitboard import NUM_PIPS, PIP_MASKS, TILES, TILE_PIPS, count_tiles, set_mask
+
+# tiles per int64 word of a mask. The sign bit is left unused so every word stays positive.
+WORD_BITS = 63
+WORD_MASK = (1 << WORD_BITS) - 1
+
+
+def to_words(mask: int, num_words: int):
+    """splits an integer tile mask into num_words int64 words, lowest tiles first."""
+    return np.array(
+        [(mask >> (WORD_BITS * w)) & WORD_MASK for w in range(num_words)], dtype=np.int64
+    )
+
+
+class TileTables:
+    """Lookup tables of a domino set for the batch engine.
+
+    Args:
+        num_pips (int): number of pip values of the set, 7 for double-six
+    """
+
+    def __init__(self, num_pips: int):
+        self.num_pips = num_pips
+        self.num_tiles = count_tiles(num_pips)
+        self.num_words = -(-self.num_tiles // WORD_BITS)
+        # open end value while the ground is still empty, it indexes the end mask accepting every tile
+        self.empty = num_pips
+
+        self.tile_a = np.array([a for a, _ in TILES[: self.num_tiles]], dtype=np.int64)
+        self.tile_b = np.array([b for _, b in TILES[: self.num_tiles]], dtype=np.int64)
+        full = set_mask(num_pips)
+        # end_masks[p] holds the tiles an open end showing p accepts
+        self.end_masks = np.stack(
+            [to_words(PIP_MASKS[p] & full, self.num_words) for p in range(num_pips)]
+            + [to_words(full, self.num_words)]
+        )
+
+        # byte_pips[w, k, byte] sums the pips of the tiles that byte stands for, as k-th byte of word w
+        pips = np.zeros(self.num_words * 64, dtype=np.int64)
+        for tid in range(self.num_tiles):
+            word, bit = divmod(tid, WORD_BITS)
+            pips[word * 64 + bit] = TILE_PIPS[tid]
+        byte_bits = (np.arange(256)[:, None] >> np.arange(8)) & 1
+        self.byte_pips = np.stack(
+            [
+                [byte_bits @ pips[w * 64 + 8 * k : w * 64 + 8 * k + 8] for k in range(8)]
+                for w in range(self.num_words)
+            ]
+        )
+
+
+@lru_cache(maxsize=None)
+def get_tables(num_pips: int = NUM_PIPS) -> TileTables:
+    return TileTables(num_pips)
+
+
+def lowest_bit_index(masks):
+    """index of the lowest set bit of every (non zero) mask."""
+    return np.log2(masks & -masks).astype(np.int64)
+
+
+def select_bit(masks, skip):
+    """tile id of the set bit of every multi-word mask that comes after skipping `skip` lower set bits.
+
+    Args:
+        masks (np.ndarray): (N, words) masks, or (N,) single-word masks
+        skip (np.ndarray): (N,) number of set bits to skip, less than the popcount of each mask
+
+    Returns:
+        np.ndarray: (N,) tile ids
+    """
+    if masks.ndim == 1:
+        word, masks = 0, masks.copy()
+    else:
+        rows = np.arange(masks.shape[0])
+        counts = np.bitwise_count(masks).astype(np.int64)
+        below = np.cumsum(counts, axis=1) - counts
+        word = (below <= skip[:, None]).sum(axis=1) - 1
+        skip = skip - below[rows, word]
+        masks = masks[rows, word]
+    skip = skip.copy()
+    # legal moves are few, so the loop runs only a handful of times
+    for _ in range(int(skip.max(initial=0))):
+        clear = skip > 0
+        masks[clear] &= masks[clear] - 1
+        skip -= clear
+    return word * WORD_BITS + lowest_bit_index(masks)
+
+
+class BatchGames:
+    """N random-policy domino rounds held as NumPy arrays, all stepped at once.
+
+    Hands are (N, players, words) tile masks and the boneyard a (N, words) mask, using the tile ids
+    of `bitboard` split into int64 words: one word up to double-nine, two for double-twelve. The
+    ground is reduced to its two open ends. Rules follow `DominoGame.play_round`: a seat without a
+    legal tile draws until it can play or the boneyard is empty, then passes.
+
+    Sets fitting one word (up to double-nine) are stepped on (N, players) and (N,) views of the masks,
+    without a word axis to reduce over in the hot loop.
+    """
+
+    def __init__(self, hands, boneyard, left, right, turn, seed=None, num_pips=NUM_PIPS):
+        """
+        Args:
+            hands (np.ndarray): (N, players, words) hand masks
+            boneyard (np.ndarray): (N, words) boneyard masks
+            left (np.ndarray): (N,) left open ends, `num_pips` for an empty ground
+            right (np.ndarray): (N,) right open ends
+            turn (np.ndarray): (N,) seat with the turn
+            seed (int, optional): seed of the move choice. Defaults to None.
+            num_pips (int, optional): number of pip values of the set. Defaults to 7 (double-six).
+        """
+        self.tables = get_tables(num_pips)
+        self.hands = hands.astype(np.int64)
+        self.boneyard = boneyard.astype(np.int64)
+        self.left = left.astype(np.int64)
+        self.right = right.astype(np.int64)
+        self.turn = turn.astype(np.int64)
+        self.num_games, self.num_players, _ = hands.shape
+        self.rng = np.random.default_rng(seed)
+        # masks step and play work on, written through to hands and boneyard
+        self.single = self.tables.num_words == 1
+        if self.single:
+            self.hand_words, self.boneyard_words = self.hands[..., 0], self.boneyard[..., 0]
+            self.end_masks = self.tables.end_masks[:, 0]
+        else:
+            self.hand_words, self.boneyard_words = self.hands, self.boneyard
+            self.end_masks = self.tables.end_masks
+
+        self.passes = np.zeros(self.num_games, dtype=np.int64)
+        self.turns = np.zeros(self.num_games, dtype=np.int64)
+        self.draws = np.zeros(self.num_games, dtype=np.int64)
+        self.done = np.zeros(self.num_games, dtype=bool)
+        self.winners = np.full(self.num_games, -1, dtype=np.int64)
+
+    @classmethod
+    def deal(cls, num_games, num_players=4, seed=None, num_pips=NUM_PIPS, hand_size=None):
+        """shuffles and deals num_games fresh rounds, like `DominoGame.get_initial_state`."""
+        tables = get_tables(num_pips)
+        rng = np.random.default_rng(seed)
+        order = np.argsort(rng.random((num_games, tables.num_tiles)), axis=1)
+        hand_size = tables.num_tiles // num_players if hand_size is None else hand_size
+        word, bit = np.divmod(order, WORD_BITS)
+        bits = np.int64(1) << bit
+
+        def gather(lo, hi):
+            return np.stack(
+                [
+                    np.bitwise_or.reduce(np.where(word[:, lo:hi] == w, bits[:, lo:hi], 0), axis=1)
+                    for w in range(tables.num_words)
+                ],
+                axis=-1,
+            )
+
+        hands = np.stack(
+            [gather(seat * hand_size, (seat + 1) * hand_size) for seat in range(num_players)],
+            axis=1,
+        )
+        boneyard = gather(num_players * hand_size, tables.num_tiles)
+        empty = np.full(num_games, tables.empty)
+        return cls(hands, boneyard, empty, empty, np.zeros(num_games), rng, num_pips)
+
+    @classmethod
+    def from_state(cls, state, num_games, seed=None):
+        """replicates a `CompactDominoState` num_games times, e.g. to run rollouts from it."""
+        num_pips = state.num_pips
+        tables = get_tables(num_pips)
+        hands = np.stack([to_words(hand, tables.num_words) for hand in state.hands])
+        boneyard = to_words(state.boneyard, tables.num_words)
+        left = tables.empty if not state.played else state.left
+        right = tables.empty if not state.played else state.right
+        return cls(
+            np.repeat(hands[None], num_games, axis=0),
+            np.repeat(boneyard[None], num_games, axis=0),
+            np.full(num_games, left),
+            np.full(num_games, right),
+            np.full(num_games, state.turn_idx),
+            seed,
+            num_pips,
+        )
+
+    def any_tile(self, masks):
+        """whether each of the step masks holds a tile."""
+        return masks != 0 if self.single else (masks != 0).any(axis=-1)
+
+    def popcount(self, masks):
+        """number of tiles in each of the step masks."""
+        counts = np.bitwise_count(masks).astype(np.int64)
+        return counts if self.single else counts.sum(axis=-1)
+
+    def random_bit(self, masks):
+        """picks one set bit of every (non zero) step mask, uniformly."""
+        skip = (self.rng.random(masks.shape[0]) * self.popcount(masks)).astype(np.int64)
+        return select_bit(masks, skip)
+
+    def mask_pips(self, masks):
+        """sums the pips of every (..., words) tile mask, a byte at a time."""
+        total = np.zeros(masks.shape[:-1], dtype=np.int64)
+        for w in range(self.tables.num_words):
+            for k in range(8):
+                total += self.tables.byte_pips[w, k, (masks[..., w] >> (8 * k)) & 255]
+        return total
+
+    def hand_pips(self):
+        """(N, players) pips left in each hand."""
+        return self.mask_pips(self.hands)
+
+    def finish(self, games, winners):
+        self.done[games] = True
+        self.winners[games] = winners
+
+    def finish_blocked(self, games):
+        """ends games nobody can play in anymore, the smallest hand value wins."""
+        self.finish(games, self.mask_pips(self.hands[games]).argmin(axis=1))
+
+    def set_tile(self, games, seat, tile):
+        """toggles tile in the hands of seat, one per game."""
+        if self.single:
+            self.hand_words[games, seat] ^= np.int64(1) << tile
+            return
+        word, bit = np.divmod(tile, WORD_BITS)
+        self.hands[games, seat, word] ^= np.int64(1) << bit
+
+    def step(self):
+        """plays one turn (a placement, a draw or a pass) in every unfinished game.
+
+        Returns:
+            int: number of games that were still running
+        """
+        active = np.flatnonzero(~self.done)
+        if not active.size:
+            return 0
+        end_masks = self.end_masks
+        hand = self.hand_words[active, self.turn[active]]
+        left, right = self.left[active], self.right[active]
+        # the same placements `generate_moves` lists: a single side when both ends are equal
+        two_sided = right != left
+        legal_l = hand & end_masks[left]
+        legal_r = np.where(two_sided if self.single else two_sided[:, None], hand & end_masks[right], 0)
+        can_play = self.any_tile(legal_l | legal_r)
+
+        # draw one tile at a time, the seat keeps the turn until it can play or the boneyard is empty
+        drawing = ~can_play & self.any_tile(self.boneyard_words[active])
+        games = active[drawing]
+        if games.size:
+            tile = self.random_bit(self.boneyard_words[games])
+            if self.single:
+                self.boneyard_words[games] ^= np.int64(1) << tile
+            else:
+                word, bit = np.divmod(tile, WORD_BITS)
+                self.boneyard[games, word] ^= np.int64(1) << bit
+            self.set_tile(games, self.turn[games], tile)
+            self.draws[games] += 1
+
+        passing = ~can_play & ~drawing
+        games = active[passing]
+        if games.size:
+            self.passes[games] += 1
+            self.turns[games] += 1
+            self.turn[games] = (self.turn[games] + 1) % self.num_players
+            stuck = games[self.passes[games] >= self.num_players]
+            if stuck.size:
+                self.finish_blocked(stuck)
+
+        games = active[can_play]
+        if games.size:
+            self.play(games, legal_l[can_play], legal_r[can_play])
+        return active.size
+
+    def play(self, games, legal_l, legal_r):
+        """places a uniformly chosen (tile, side) action in each of games."""
+        tables = self.tables
+        seat = self.turn[games]
+        count_l = self.popcount(legal_l)
+        count_r = self.popcount(legal_r)
+        pick = (self.rng.random(games.size) * (count_l + count_r)).astype(np.int64)
+        to_left = pick < count_l
+        tile = select_bit(
+            np.where(to_left if self.single else to_left[:, None], legal_l, legal_r),
+            np.where(to_left, pick, pick - count_l),
+        )
+        a, b = tables.tile_a[tile], tables.tile_b[tile]
+        left, right = self.left[games], self.right[games]
+
+        empty = left == tables.empty
+        new_l = np.where(a == left, b, a)
+        new_r = np.where(a == right, b, a)
+        self.left[games] = np.where(empty, a, np.where(to_left, new_l, left))
+        self.right[games] = np.where(empty, b, np.where(to_left, right, new_r))
+
+        self.set_tile(games, seat, tile)
+        self.passes[games] = 0
+        self.turns[games] += 1
+
+        won = ~self.any_tile(self.hand_words[games, seat])
+        self.finish(games[won], seat[won])
+
+        games = games[~won]
+        unplayed = np.bitwise_or.reduce(self.hand_words[games], axis=1) | self.boneyard_words[games]
+        ends = self.end_masks[self.left[games]] | self.end_masks[self.right[games]]
+        blocked = ~self.any_tile(unplayed & ends)
+        if blocked.any():
+            self.finish_blocked(games[blocked])
+        games = games[~blocked]
+        self.turn[games] = (self.turn[games] + 1) % self.num_players
+
+    def run(self):
+        """steps every game to its end.
+
+        Returns:
+            np.ndarray: (N, players) pips left in each hand
+            np.ndarray: (N,) winning seat of each game
+        """
+        while self.step():
+            pass
+        return self.hand_pips(), self.winners
+
+
+def play_random_games(num_games, num_players=4, seed=None, num_pips=NUM_PIPS, hand_size=None):
+    """deals and plays num_games random-policy rounds, see `BatchGames.run`."""
+    return BatchGames.deal(num_games, num_players, seed, num_pips, hand_size).run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="random-policy batch engine throughput")
+    parser.add_argument("--games", type=int, default=100_000)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--num_tiles", type=int, default=NUM_PIPS, help="pip values of the set: 7, 10 or 13")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    pips, winners = play_random_games(args.games, args.players, args.seed, args.num_tiles)
+    elapsed = time.perf_counter() - start
+    print(f"{args.games} games in {elapsed:.2f}s, {args.games / elapsed:.0f} games/s")
+    print("wins per seat:", np.bincount(winners, minlength=args.players))
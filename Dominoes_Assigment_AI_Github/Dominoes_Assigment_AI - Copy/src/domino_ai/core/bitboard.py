@@ -0,0 +1,378 @@
+import random
+from typing import Iterator, List, Tuple
+
+from .domino_components import Domino
+
+# Tile ids are the precomputed `Domino.id`. Their triangular numbering makes every set a prefix of the
+# double-twelve set, so the tables below serve double-six, double-nine and double-twelve games alike.
+# Masks are python integers, as wide as the set needs.
+MAX_PIPS = 13
+TILES: List[Tuple[int, int]] = [
+    (i, j) for j in range(MAX_PIPS) for i in range(j + 1)
+]
+
+
+def count_tiles(num_pips: int) -> int:
+    """number of tiles of the set whose pip values are 0 to num_pips - 1."""
+    return num_pips * (num_pips + 1) // 2
+
+
+def set_mask(num_pips: int) -> int:
+    """mask of every tile of the set whose pip values are 0 to num_pips - 1."""
+    return (1 << count_tiles(num_pips)) - 1
+
+
+# default double-six set
+NUM_PIPS = 7
+NUM_TILES = count_tiles(NUM_PIPS)
+FULL_MASK = set_mask(NUM_PIPS)
+
+# largest table the seat indexed tables below are sized for
+MAX_PLAYERS = 8
+
+# open end value used while the ground is still empty
+EMPTY_END = -1
+
+TILE_PIPS = [l + r for l, r in TILES]
+
+# PIP_MASKS[p] holds every tile that shows the pip value p on one of its halves.
+PIP_MASKS = [0] * MAX_PIPS
+for _id, (_l, _r) in enumerate(TILES):
+    PIP_MASKS[_l] |= 1 << _id
+    PIP_MASKS[_r] |= 1 << _id
+
+
+def void_tiles(voids: int) -> int:
+    """mask of every tile showing one of the pip values of a voids mask (bit p set for pip value p)."""
+    mask = 0
+    for pip in range(MAX_PIPS):
+        if voids >> pip & 1:
+            mask |= PIP_MASKS[pip]
+    return mask
+
+
+# Zobrist keys, drawn once from a fixed seed so position keys are stable between runs.
+# A position key XORs the key of each tile in a hand (per seat), of each played tile, of both open ends
+# and of the seat to move. Boneyard tiles need no key, they are whatever the set holds besides those.
+# The end tables have one extra entry, the last one, that `EMPTY_END` indexes.
+_zobrist_rng = random.Random(0x5EED)
+ZOBRIST_HANDS = [[_zobrist_rng.getrandbits(64) for _ in TILES] for _ in range(MAX_PLAYERS)]
+ZOBRIST_PLAYED = [_zobrist_rng.getrandbits(64) for _ in TILES]
+ZOBRIST_LEFT = [_zobrist_rng.getrandbits(64) for _ in range(MAX_PIPS + 1)]
+ZOBRIST_RIGHT = [_zobrist_rng.getrandbits(64) for _ in range(MAX_PIPS + 1)]
+ZOBRIST_TURN = [_zobrist_rng.getrandbits(64) for _ in range(MAX_PLAYERS)]
+
+
+def generate_moves(hand: int, left: int, right: int) -> List[Tuple[int, str]]:
+    """Side-effect free legal move generator.
+
+    Legal tiles are the bitwise AND of the hand with the tiles matching each open end.
+    An empty ground accepts any tile on the left side. When both open ends show the
+    same pip value only the left placement is listed, as both lead to the same position.
+
+    Args:
+        hand (int): hand mask
+        left (int): left open end, `EMPTY_END` for an empty ground
+        right (int): right open end
+
+    Returns:
+        List[Tuple[int,str]]: (tile_id, side) actions
+    """
+    if left == EMPTY_END:
+        return [(i, "l") for i in iter_ids(hand)]
+    moves = [(i, "l") for i in iter_ids(hand & PIP_MASKS[left])]
+    if right != left:
+        moves += [(i, "r") for i in iter_ids(hand & PIP_MASKS[right])]
+    return moves
+
+
+def tile_id(tile: Domino) -> int:
+    """returns the bit index of a domino tile or ground placement, regardless of its orientation."""
+    return tile.id
+
+
+def hand_to_mask(hand: List[Domino]) -> int:
+    """encodes a list of tiles as an integer mask."""
+    mask = 0
+    for tile in hand:
+        mask |= 1 << tile_id(tile)
+    return mask
+
+
+def iter_ids(mask: int) -> Iterator[int]:
+    """yields tile ids of the set bits in mask, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def mask_to_tiles(mask: int) -> List[Domino]:
+    """decodes an integer mask back into Domino tiles."""
+    return [Domino(*TILES[i]) for i in iter_ids(mask)]
+
+
+def count_mask(mask: int) -> int:
+    """Counts the number of pips of all tiles in mask."""
+    return sum(TILE_PIPS[i] for i in iter_ids(mask))
+
+
+def zobrist_key(hands: List[int], left: int, right: int, played: int, turn_idx: int) -> int:
+    """Computes the Zobrist key of a position from scratch. `CompactDominoState` keeps it up to date move by move.
+
+    Args:
+        hands (List[int]): hand mask of each seat
+        left (int): left open end, `EMPTY_END` for an empty ground
+        right (int): right open end
+        played (int): mask of the tiles on the ground
+        turn_idx (int): seat to move
+
+    Returns:
+        int: 64 bit position key
+    """
+    key = ZOBRIST_LEFT[left] ^ ZOBRIST_RIGHT[right] ^ ZOBRIST_TURN[turn_idx]
+    for seat, hand in enumerate(hands):
+        for i in iter_ids(hand):
+            key ^= ZOBRIST_HANDS[seat][i]
+    for i in iter_ids(played):
+        key ^= ZOBRIST_PLAYED[i]
+    return key
+
+
+class CompactDominoState:
+    """Compact alternative to `DominoState`.
+
+    Each hand and the boneyard are integer masks (28 bits for a double-six set), the ground is reduced to
+    its two open ends plus a mask of the played tiles. Copying a state copies a
+    handful of integers. The pip total of each hand is kept as tiles are played,
+    tile counts are the popcount of the hand masks. So is the Zobrist `key` of the
+    position, see `zobrist_key`.
+
+    Each seat also has a mask of the pip values it publicly showed it doesn't hold (bit p for pip value p), by
+    drawing or passing when the open ends showed them, see `show_void`. They aren't part of the key.
+    """
+
+    __slots__ = ("hands", "boneyard", "left", "right", "played", "turn_idx", "pips", "full", "key", "voids")
+
+    def __init__(
+        self,
+        hands: List[int],
+        boneyard: int,
+        left: int = EMPTY_END,
+        right: int = EMPTY_END,
+        played: int = 0,
+        turn_idx: int = 0,
+        pips: List[int] = None,
+        full: int = None,
+        key: int = None,
+        voids: List[int] = None,
+    ):
+        self.hands = hands
+        self.boneyard = boneyard
+        self.left = left
+        self.right = right
+        self.played = played
+        self.turn_idx = turn_idx
+        self.pips = [count_mask(hand) for hand in hands] if pips is None else pips
+        if full is None:
+            full = boneyard | played
+            for hand in hands:
+                full |= hand
+        # every tile of the set in play, i.e. dealt, drawn or played
+        self.full = full
+        self.key = zobrist_key(hands, left, right, played, turn_idx) if key is None else key
+        self.voids = [0] * len(hands) if voids is None else voids
+
+    @classmethod
+    def from_state(cls, state):
+        """builds a compact state out of a `DominoState`.
+
+        Args:
+            state (DominoState): object based domino state
+
+        Returns:
+            CompactDominoState: equivalent compact state
+        """
+        if state.ground:
+            left, right = state.ground[0].left, state.ground[-1].right
+        else:
+            left = right = EMPTY_END
+        return cls(
+            [hand_to_mask(player.hand) for player in state.players],
+            hand_to_mask(state.tiles),
+            left,
+            right,
+            hand_to_mask(state.ground),
+            state.turn_idx,
+            [player.count_hand() for player in state.players],
+            voids=state.voids[:],
+        )
+
+    def __repr__(self):
+        return (
+            f"<CompactDominoState(ends=({self.left}, {self.right}), "
+            f"hands={[mask_to_tiles(h) for h in self.hands]}, "
+            f"boneyard={mask_to_tiles(self.boneyard)}, turn_idx={self.turn_idx})>"
+        )
+
+    @property
+    def num_players(self):
+        return len(self.hands)
+
+    @property
+    def num_pips(self):
+        """number of pip values of the set the state is played with, 7 for double-six."""
+        num_pips = NUM_PIPS
+        while set_mask(num_pips) & self.full != self.full:
+            num_pips += 1
+        return num_pips
+
+    def copy(self):
+        return CompactDominoState(
+            self.hands[:],
+            self.boneyard,
+            self.left,
+            self.right,
+            self.played,
+            self.turn_idx,
+            self.pips[:],
+            self.full,
+            self.key,
+            self.voids[:],
+        )
+
+    def change_turn(self):
+        turn_idx = (self.turn_idx + 1) % len(self.hands)
+        self.key ^= ZOBRIST_TURN[self.turn_idx] ^ ZOBRIST_TURN[turn_idx]
+        self.turn_idx = turn_idx
+
+    def get_valid_moves(self, seat=None):
+        """lists legal placements of a seat as (tile_id, side) actions, see `generate_moves`.
+
+        Args:
+            seat (int, optional): seat to generate moves for. Defaults to player with the turn.
+
+        Returns:
+            List[Tuple[int,str]]: legal actions
+        """
+        hand = self.hands[self.turn_idx if seat is None else seat]
+        return generate_moves(hand, self.left, self.right)
+
+    def play(self, action: Tuple[int, str], seat=None):
+        """places a tile from a seat's hand onto the ground.
+
+        Args:
+            action (Tuple[int,str]): tile id and side ("l" or "r") to place it on
+            seat (int, optional): seat playing the tile. Defaults to player with the turn.
+
+        Returns:
+            CompactDominoState: the same (mutated) state
+        """
+        tid, side = action
+        seat = self.turn_idx if seat is None else seat
+        bit = 1 << tid
+        if not self.hands[seat] & bit:
+            raise ValueError(f"tile {TILES[tid]} is not in hand of seat {seat}")
+        a, b = TILES[tid]
+        left, right = self.left, self.right
+        if not self.played:
+            self.left, self.right = a, b
+        elif side == "l":
+            if self.left not in (a, b):
+                raise ValueError(f"tile {TILES[tid]} doesn't match left end {self.left}")
+            self.left = b if a == self.left else a
+        else:
+            if self.right not in (a, b):
+                raise ValueError(f"tile {TILES[tid]} doesn't match right end {self.right}")
+            self.right = b if a == self.right else a
+        self.hands[seat] ^= bit
+        self.played |= bit
+        self.pips[seat] -= TILE_PIPS[tid]
+        self.key ^= (
+            ZOBRIST_HANDS[seat][tid]
+            ^ ZOBRIST_PLAYED[tid]
+            ^ ZOBRIST_LEFT[left]
+            ^ ZOBRIST_LEFT[self.left]
+            ^ ZOBRIST_RIGHT[right]
+            ^ ZOBRIST_RIGHT[self.right]
+        )
+        return self
+
+    def apply(self, action):
+        """plays action for the player with the turn, then passes the turn on.
+
+        Args:
+            action (Tuple[int,str] | None): (tile_id, side) to place, None to pass
+
+        Returns:
+            tuple: undo record for `undo`
+        """
+        seat = self.turn_idx
+        record = (seat, self.hands[seat], self.left, self.right, self.played, self.key, self.voids[seat])
+        if action is not None:
+            self.play(action, seat)
+        else:
+            self.show_void(seat, drew=False)
+        self.change_turn()
+        return record
+
+    def undo(self, record):
+        """reverts the move `apply` returned record for."""
+        seat, hand, self.left, self.right, self.played, self.key, self.voids[seat] = record
+        taken = hand & ~self.hands[seat]
+        if taken:
+            self.pips[seat] += TILE_PIPS[taken.bit_length() - 1]
+        self.hands[seat] = hand
+        self.turn_idx = seat
+
+    def show_void(self, seat: int, drew: bool):
+        """Records that seat holds no tile matching the open ends, as it has to draw or pass.
+
+        The tile a seat draws is hidden from the others, so after a draw only the current ends are known void.
+        """
+        ends = (1 << self.left | 1 << self.right) if self.played else 0
+        self.voids[seat] = ends if drew else self.voids[seat] | ends
+
+    def draw(self, tid: int, seat=None):
+        """moves a tile from the boneyard to a seat's hand, the seat showing a void (see `show_void`). The turn doesn't change.
+
+        Args:
+            tid (int): id of the boneyard tile
+            seat (int, optional): seat drawing the tile. Defaults to player with the turn.
+
+        Returns:
+            CompactDominoState: the same (mutated) state
+        """
+        seat = self.turn_idx if seat is None else seat
+        bit = 1 << tid
+        if not self.boneyard & bit:
+            raise ValueError(f"tile {TILES[tid]} is not in the boneyard")
+        self.show_void(seat, drew=True)
+        self.boneyard ^= bit
+        self.hands[seat] |= bit
+        self.pips[seat] += TILE_PIPS[tid]
+        self.key ^= ZOBRIST_HANDS[seat][tid]
+        return self
+
+    def undo_draw(self, tid: int, seat=None, void=None):
+        """puts a tile `draw` took back into the boneyard, and gives the seat back its void mask from before when given."""
+        seat = self.turn_idx if seat is None else seat
+        if void is not None:
+            self.voids[seat] = void
+        bit = 1 << tid
+        self.hands[seat] ^= bit
+        self.boneyard |= bit
+        self.pips[seat] -= TILE_PIPS[tid]
+        self.key ^= ZOBRIST_HANDS[seat][tid]
+
+    def hand_pips(self, seat: int) -> int:
+        return self.pips[seat]
+
+    def hand_size(self, seat: int) -> int:
+        return self.hands[seat].bit_count()
+
+    def is_blocked(self) -> bool:
+        """True when no unplayed tile (in hands or boneyard) matches the open ends."""
+        if not self.played:
+            return False
+        return not self.full & ~self.played & (PIP_MASKS[self.left] | PIP_MASKS[self.right])
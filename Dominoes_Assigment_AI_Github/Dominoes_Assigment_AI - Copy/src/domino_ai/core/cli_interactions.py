@@ -1,13 +1,25 @@
 from colorama import Fore, Style
 import os
 
+from .domino_components import check_play
+
 # Get terminal size
 try:
     max_width = os.get_terminal_size().columns
 except:
     max_width = 80
 
-colors = [Fore.LIGHTGREEN_EX, Fore.LIGHTBLUE_EX]
+# one color per seat, up to 8 players
+colors = [
+    Fore.LIGHTGREEN_EX,
+    Fore.LIGHTBLUE_EX,
+    Fore.LIGHTMAGENTA_EX,
+    Fore.LIGHTCYAN_EX,
+    Fore.LIGHTRED_EX,
+    Fore.LIGHTWHITE_EX,
+    Fore.GREEN,
+    Fore.BLUE,
+]
 
 
 def draw_box(content_list, style="thin"):
@@ -56,7 +68,6 @@ def cli_feedback(state, print_status=True, main_player=None):
     Returns:
         _type_: _description_
     """
-    ## depends on game.get_valid_moves.
     if not print_status:
         return
 
@@ -79,7 +90,9 @@ def cli_feedback(state, print_status=True, main_player=None):
 
     ui_tiles = []
     rest_tiles = []
-    for i in zip(main_player.hand, main_player.conditions):
+    for i in zip(
+        main_player.hand, [check_play(state.ground, tile) for tile in main_player.hand]
+    ):
         if any(i[1]):
             ui_tiles.append(i[0])
         else:
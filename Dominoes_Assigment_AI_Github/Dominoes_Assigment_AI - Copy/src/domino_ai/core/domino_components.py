@@ -4,12 +4,38 @@ from typing import List, Tuple
 class Domino:
     """Domino
     representing Domino tile. And providing some useful functionalites.
+
+    Tiles are interned: `Domino(3, 1)` and `Domino(1, 3)` return the same immutable object,
+    stored as [1 | 3], with a precomputed integer id and hash. The orientation a tile is laid
+    with and the color of its player belong to the ground `Placement`, not to the tile.
     """
 
-    def __init__(self, left: int, right: int, color=None):
-        self.left = left
-        self.right = right
-        self.color = color
+    __slots__ = ("left", "right", "id")
+    _interned = {}
+
+    def __new__(cls, left: int, right: int):
+        key = (left, right) if left <= right else (right, left)
+        tile = cls._interned.get(key)
+        if tile is None:
+            tile = super().__new__(cls)
+            object.__setattr__(tile, "left", key[0])
+            object.__setattr__(tile, "right", key[1])
+            # triangular numbering, a double-six set is a prefix of any larger set
+            object.__setattr__(tile, "id", key[1] * (key[1] + 1) // 2 + key[0])
+            cls._interned[key] = tile
+        return tile
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Domino tiles are immutable")
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return Domino, (self.left, self.right)
 
     def __repr__(self):
         return f"[{self.left} | {self.right}]"
@@ -38,13 +64,9 @@ class Domino:
 {self.left}   o   {self.right}
 └─┴─┘"""
 
-    def flip(self, inplace=False):
-        """Flip the domino tile."""
-        if inplace:
-            self.left, self.right = self.right, self.left
-            return self
-        else:
-            return Domino(self.right, self.left)
+    def flip(self, color=None):
+        """returns the tile laid the other way round, as a ground `Placement`."""
+        return Placement(self, flipped=True, color=color)
 
     def count_tile(self):
         """Count the number of pips(dots) in the domino tile."""
@@ -52,12 +74,11 @@ class Domino:
 
     def __hash__(self):
         """unifying representation of dominos with same right and left. i.e Domino(1,3) equals Domino(3,1)"""
-        return hash(frozenset((self.left, self.right)))
+        return self.id
 
     def __eq__(self, other):
-        if isinstance(other, Domino):
-            return {self.left, self.right} == {other.left, other.right}
-        return False
+        # tiles are interned, Domino(1,3) is Domino(3,1)
+        return self is other
 
     def __contains__(self, item):
         return item in (self.left, self.right)
@@ -66,6 +87,30 @@ class Domino:
         return self.right == self.left
 
 
+class Placement:
+    """A tile as laid on the ground: its orientation and the color of the player who placed it."""
+
+    __slots__ = ("tile", "left", "right", "id", "color")
+
+    def __init__(self, tile: Domino, flipped=False, color=None):
+        self.tile = tile
+        self.id = tile.id
+        if flipped:
+            self.left, self.right = tile.right, tile.left
+        else:
+            self.left, self.right = tile.left, tile.right
+        self.color = color
+
+    def __repr__(self):
+        return f"[{self.left} | {self.right}]"
+
+    get_ground_tile = Domino.get_ground_tile
+    get_domino = Domino.get_domino
+    count_tile = Domino.count_tile
+    is_double = Domino.is_double
+    __contains__ = Domino.__contains__
+
+
 type_Hand = List[Domino]
 
 
@@ -73,27 +118,39 @@ class Player:
     def __init__(self, name):
         self.name = name
         self.hand = []  # Ensure hand is always initialized as a list
+        self.hand_value = 0  # running pip total of hand, kept by the methods below
         self.score = 0
-        self.conditions = []
 
     def set_hand(self, tiles):
         """Sets the player's hand."""
         self.hand = tiles if tiles else []  # Ensure hand is a list, even if tiles is None
+        self.hand_value = count_hand(self.hand)
 
     def append_tile_to_hand(self, tile):
         """Appends a tile to the player's hand."""
         if self.hand is None:  # Safeguard against None
             self.hand = []
         self.hand.append(tile)
+        self.hand_value += tile.count_tile()
+
+    def insert_tile_to_hand(self, idx, tile):
+        """Inserts a tile back at a given position of the player's hand."""
+        self.hand.insert(idx, tile)
+        self.hand_value += tile.count_tile()
 
     def count_hand(self):
-        """Counts the total value of tiles in the player's hand."""
-        if self.hand is None:  # Safeguard against None
-            return 0
-        return sum([tile.count_tile() for tile in self.hand])
+        """Returns the total value of tiles in the player's hand, without re-summing them."""
+        return self.hand_value
 
     def remove_tile_from_hand(self, tile: Domino):
         self.hand.remove(tile)
+        self.hand_value -= tile.count_tile()
+
+    def pop_tile_from_hand(self, idx):
+        """Removes and returns the tile at a given position of the player's hand."""
+        tile = self.hand.pop(idx)
+        self.hand_value -= tile.count_tile()
+        return tile
 
     def __repr__(self):
         return f"{self.name}: {self.hand}"
@@ -128,17 +185,9 @@ def check_play(ground_tiles: List[Domino], tile: Domino) -> Tuple[bool, bool]:
     if not ground_tiles:
         return True, False
 
-    # Check right side
-    r = ground_tiles[-1].right == tile.left or ground_tiles[-1].right == tile.right
-
-    # Check left side
-    l = ground_tiles[0].left == tile.right or ground_tiles[0].left == tile.left
-
-    # Flip the tile in-place only if needed
-    if r and ground_tiles[-1].right == tile.right:
-        tile.flip(inplace=True)
-    elif l and ground_tiles[0].left == tile.left:
-        tile.flip(inplace=True)
+    # the tile isn't touched, `orient_if_needed` lays it once the side is known
+    l = ground_tiles[0].left in tile
+    r = ground_tiles[-1].right in tile
 
     return l, r
 
@@ -159,7 +208,7 @@ def count_hand(hand):
     return sum([tile.count_tile() for tile in hand])
 
 
-def orient_if_needed(ground_l, ground_r, tile: Domino, direction: str):
+def orient_if_needed(ground_l, ground_r, tile: Domino, direction: str, color=None):
     """
 
     Args:
@@ -167,18 +216,17 @@ def orient_if_needed(ground_l, ground_r, tile: Domino, direction: str):
         ground_r (int): right side of the ground tiles
         tile (Domino): domino tile
         direction (str): what side should tile be placed (left or right)
+        color (int, optional): index of the player placing the tile. Defaults to None.
 
     Returns:
-        Domino: same domino tile, oriented before placement
+        Placement: the tile, oriented for placement
     """
     ground = ground_r if direction == "r" else ground_l
     if direction == "r":
-        if not ground == tile.left:
-            tile.flip(inplace=True)
+        flipped = not ground == tile.left
     else:
-        if not ground == tile.right:
-            tile.flip(inplace=True)
-    return tile
+        flipped = not ground == tile.right
+    return Placement(tile, flipped, color)
 
 
 if __name__ == "__main__":
@@ -11,10 +11,21 @@ from .domino_components import (
     Domino,
     Player,
     AI_Player,
+    Placement,
     check_play,
     orient_if_needed,
 )
-from .utils import validate_direction, validate_idx
+from .bitboard import (
+    CompactDominoState,
+    EMPTY_END,
+    MAX_PIPS,
+    MAX_PLAYERS,
+    TILES,
+    generate_moves,
+    hand_to_mask,
+    iter_ids,
+)
+from .utils import get_hand_frequency, validate_direction, validate_idx
 from .cli_interactions import cli_feedback
 
 
@@ -25,10 +36,6 @@ def clear_terminal():
         os.system("clear")
 
 
-# make use of logging if you make 2 AI compete each other
-logging.basicConfig(filename="logging.txt", filemode="w", level=logging.INFO)
-
-
 class DominoState:
     def __init__(
         self,
@@ -41,6 +48,12 @@ class DominoState:
         self.tiles = tiles
         self.players = players
         self.turn_idx = turn_idx
+        # number of unplayed tiles (hands and boneyard) showing each pip value, kept up to date as tiles are played
+        self.pip_counts = get_hand_frequency(
+            tiles + [tile for player in players for tile in player.hand]
+        )
+        # pip values each seat showed it doesn't hold, see `CompactDominoState.show_void`
+        self.voids = [0] * len(players)
 
     def __repr__(self):
         return f"<DominoState(ground={self.ground}, tiles={self.tiles}, players={self.players}, turn_idx={self.turn_idx})>"
@@ -51,23 +64,111 @@ class DominoState:
     def copy(self):
         return copy.deepcopy(self)
 
+    def compact(self):
+        """returns the equivalent `CompactDominoState`, cheap to copy during search."""
+        return CompactDominoState.from_state(self)
+
     def change_turn(self):
         self.turn_idx = (self.turn_idx + 1) % len(self.players)
 
+    def show_void(self, drew=False):
+        """records that the player with the turn holds no tile matching the open ends, as it has to draw or pass."""
+        ends = (1 << self.ground[0].left | 1 << self.ground[-1].right) if self.ground else 0
+        self.voids[self.turn_idx] = ends if drew else self.voids[self.turn_idx] | ends
+
+    def update_pip_counts(self, tile: Domino, delta: int):
+        """shifts the unplayed count of tile's pip values by delta, -1 when it's played and +1 when taken back."""
+        self.pip_counts[tile.left] += delta
+        if not tile.is_double():
+            self.pip_counts[tile.right] += delta
+
+
+
+class RoundResult:
+    """Outcome of a headless round.
+
+    Args:
+        winner (int): winning seat
+        points (int): points the winner scored
+        hands (List[int]): pips left in each seat's hand
+        turns (int): number of turns, passes included
+        draws (int): number of tiles drawn from the boneyard
+        moves (List[Tuple[int,int,str]]): (seat, tile_id, side) of every placement, in order
+    """
+
+    def __init__(self, winner, points, hands, turns, draws, moves):
+        self.winner = winner
+        self.points = points
+        self.hands = hands
+        self.turns = turns
+        self.draws = draws
+        self.moves = moves
+
+    def __repr__(self):
+        return f"<RoundResult(winner={self.winner}, points={self.points}, turns={self.turns}, draws={self.draws})>"
+
+
+class MatchResult:
+    """Outcome of a headless match.
+
+    Args:
+        winner (int): winning seat
+        scores (List[int]): final score of each seat
+        rounds (List[RoundResult]): every round played
+    """
+
+    def __init__(self, winner, scores, rounds):
+        self.winner = winner
+        self.scores = scores
+        self.rounds = rounds
+
+    @property
+    def turns(self):
+        return sum(r.turns for r in self.rounds)
+
+    @property
+    def draws(self):
+        return sum(r.draws for r in self.rounds)
+
+    @property
+    def moves(self):
+        return [r.moves for r in self.rounds]
+
+    def __repr__(self):
+        return f"<MatchResult(winner={self.winner}, scores={self.scores}, rounds={len(self.rounds)}, turns={self.turns})>"
 
 
 class DominoGame:
-    def __init__(self, players: List[str] = ["ai1", "ai2", "ai3", "ai4"], seed=None):
+    def __init__(
+        self,
+        players: List[str] = ["ai1", "ai2", "ai3", "ai4"],
+        seed=None,
+        num_tiles=7,
+        hand_size=None,
+    ):
         """Initializes the game with unique AI players.
 
         Args:
-            players (List[str]): List of AI types for each player.
+            players (List[str]): List of AI types for each player, up to 8 players.
             seed (int, optional): Random seed for reproducibility.
+            num_tiles (int, optional): number of pip values of the set, as in `generate_domino_set`.
+                7 for double-six (28 tiles), 10 for double-nine (55 tiles), 13 for double-twelve (91 tiles). Defaults to 7.
+            hand_size (int, optional): tiles dealt to each player. Defaults to an even split of the whole set.
         """
+        if not 1 <= len(players) <= MAX_PLAYERS:
+            raise ValueError(f"1 to {MAX_PLAYERS} players are supported, got {len(players)}")
+        if not 1 <= num_tiles <= MAX_PIPS:
+            raise ValueError(f"sets up to double-{MAX_PIPS - 1} are supported, got {num_tiles} pip values")
         self.players_types = players
         self.num_players = len(players)
+        self.num_tiles = num_tiles
         self.players: List[Player] = []
 
+        set_size = len(generate_domino_set(num_tiles))
+        self.hand_size = set_size // self.num_players if hand_size is None else hand_size
+        if self.hand_size * self.num_players > set_size:
+            raise ValueError(f"can't deal {self.hand_size} tiles to {self.num_players} players out of {set_size}")
+
         for i, ai_type in enumerate(players):
             self.players.append(AI_Player(f"ai {i+1}", ai_type=ai_type))
 
@@ -79,11 +180,11 @@ class DominoGame:
 
     def get_initial_state(self):
         """Deals tiles after generating a shuffled domino tile set."""
-        tiles = generate_domino_set()
+        tiles = generate_domino_set(self.num_tiles)
         random.shuffle(tiles)  # Ensure fair shuffling
 
         # Deal tiles equally among players
-        hand_size = len(tiles) // self.num_players
+        hand_size = self.hand_size
         for i, player in enumerate(self.players):
             player.set_hand(tiles[i * hand_size : (i + 1) * hand_size])
 
@@ -106,31 +207,40 @@ class DominoGame:
         l, r = ground[0].left, ground[-1].right
         return l, r
 
-    def get_valid_moves(self, player: Union[Player, AI_Player], ground: List[Domino]):
-        """traverses player's hand, and check validity of each tile. And writes the result onto player object.
+    def get_valid_moves(
+        self,
+        player: Union[Player, AI_Player, CompactDominoState],
+        ground: List[Domino] = None,
+    ):
+        """traverses player's hand, and check validity of each tile. Neither the player nor its tiles are modified.
+
+        When a `CompactDominoState` is passed instead of a player, the legal actions of the player with the turn are returned.
 
         Args:
-            player (Player): player to check his valid placements
+            player (Player | CompactDominoState): player to check his valid placements
             ground (List[Domino]): ground tiles
 
         Returns:
             List[Tuple[bool,bool]]: validity of each tile in player's hand
+            List[Tuple[int,str]]: (tile_id, side) actions, for a compact state
         """
-        hand = player.hand
-        conditions = [check_play(ground, tile) for tile in hand]
-        player.conditions = conditions
+        if isinstance(player, CompactDominoState):
+            return player.get_valid_moves()
 
-        return conditions
+        return [check_play(ground, tile) for tile in player.hand]
 
     def get_next_state(
-        self, state: DominoState, action: Domino, player: Union[Player, AI_Player]
+        self,
+        state: Union[DominoState, CompactDominoState],
+        action: Domino,
+        player: Union[Player, AI_Player] = None,
     ):
         """given current state, action(Domino to place) and the player performing action, this function returns the next state.
 
         Args:
-            state (DominoState): _description_
-            action (Domino): _description_
-            player (Union[Player,AI_Player]): _description_
+            state (DominoState | CompactDominoState): current state, modified in place
+            action (Domino | Tuple[int,str]): tile to place, or (tile_id, side) for a compact state
+            player (Union[Player,AI_Player]): player placing the tile. Not used for a compact state.
 
         Raises:
             e: An expection if anything goes wrong
@@ -138,12 +248,18 @@ class DominoGame:
         Returns:
             DominoState: next
         """
+        if isinstance(state, CompactDominoState):
+            return state.play(action)
+
         try:
-            condition = player.conditions[player.hand.index(action)]
+            condition = check_play(state.ground, player.hand[player.hand.index(action)])
         except Exception as e:
             raise e
 
-        if all(condition):
+        color = state.turn_idx
+        if not state.ground:
+            state.ground.append(Placement(action, color=color))
+        elif all(condition):
             if type(player) is Player and (
                 state.ground[-1].right != state.ground[0].left
             ):
@@ -156,18 +272,183 @@ class DominoGame:
 
             l, r = self.get_ground_ends(state.ground)
             if direction == "r":
-                state.ground.append(orient_if_needed(l, r, action, direction))
+                state.ground.append(orient_if_needed(l, r, action, direction, color))
             else:
-                state.ground.insert(0, orient_if_needed(l, r, action, direction))
+                state.ground.insert(0, orient_if_needed(l, r, action, direction, color))
         elif condition[0]:
-            state.ground.insert(0, action)
+            l, r = self.get_ground_ends(state.ground)
+            state.ground.insert(0, orient_if_needed(l, r, action, "l", color))
         elif condition[1]:
-            state.ground.append(action)
+            l, r = self.get_ground_ends(state.ground)
+            state.ground.append(orient_if_needed(l, r, action, "r", color))
 
-        player.hand.remove(action)
-        action.color = state.turn_idx
+        player.remove_tile_from_hand(action)
+        state.update_pip_counts(action, -1)
         return state
 
+    def get_actions(self, state: Union[DominoState, CompactDominoState]):
+        """lists legal (tile_id, side) actions of the player with the turn.
+
+        Args:
+            state (DominoState | CompactDominoState): current state
+
+        Returns:
+            List[Tuple[int,str]]: legal actions, side being "l" or "r"
+        """
+        if isinstance(state, CompactDominoState):
+            return state.get_valid_moves()
+
+        return self.get_player_actions(state, state.turn_idx)
+
+    def get_state_key(self, state: Union[DominoState, CompactDominoState]):
+        """returns the Zobrist key of a position, see `zobrist_key`. Compact states keep theirs up to date, object states are hashed from scratch."""
+        if isinstance(state, CompactDominoState):
+            return state.key
+        return state.compact().key
+
+    def get_player_actions(self, state: DominoState, seat: int):
+        """lists legal (tile_id, side) actions of any seat of an object state, see `generate_moves`."""
+        if not state.ground:
+            return generate_moves(hand_to_mask(state.players[seat].hand), EMPTY_END, EMPTY_END)
+        l, r = self.get_ground_ends(state.ground)
+        return generate_moves(hand_to_mask(state.players[seat].hand), l, r)
+
+    def get_action_tile(self, state: DominoState, action):
+        """returns the tile of player's hand an action refers to."""
+        tid = action[0]
+        for tile in state.players[state.turn_idx].hand:
+            if tile.id == tid:
+                return tile
+        raise ValueError(f"tile {TILES[tid]} not found in hand: {state.players[state.turn_idx].hand}")
+
+    def apply_move(self, state: Union[DominoState, CompactDominoState], action):
+        """Plays action for the player with the turn and passes the turn on, in place.
+
+        Args:
+            state (DominoState | CompactDominoState): current state
+            action (Tuple[int,str] | None): (tile_id, side) to place, None to pass
+
+        Returns:
+            tuple: undo record, to be handed to `undo_move`
+        """
+        if isinstance(state, CompactDominoState):
+            return state.apply(action)
+
+        seat = state.turn_idx
+        void = state.voids[seat]
+        if action is None:
+            state.show_void()
+        state.change_turn()
+        if action is None:
+            return (seat, None, None, void)
+
+        tid, side = action
+        player = state.players[seat]
+        idx = next(i for i, tile in enumerate(player.hand) if tile.id == tid)
+        tile = player.pop_tile_from_hand(idx)
+        state.update_pip_counts(tile, -1)
+        if not state.ground:
+            state.ground.append(Placement(tile, color=seat))
+        elif side == "l":
+            l, r = self.get_ground_ends(state.ground)
+            state.ground.insert(0, orient_if_needed(l, r, tile, side, seat))
+        else:
+            l, r = self.get_ground_ends(state.ground)
+            state.ground.append(orient_if_needed(l, r, tile, side, seat))
+        return (seat, idx, side, void)
+
+    def undo_move(self, state: Union[DominoState, CompactDominoState], record):
+        """Reverts a move made by `apply_move`, taking the placement off its ground side and giving the tile back to its hand slot and player.
+
+        Args:
+            state (DominoState | CompactDominoState): state the move was applied to
+            record (tuple): undo record returned by `apply_move`
+        """
+        if isinstance(state, CompactDominoState):
+            state.undo(record)
+            return
+
+        seat, idx, side, state.voids[seat] = record
+        state.turn_idx = seat
+        if idx is None:
+            return
+        placement = state.ground.pop(0) if side == "l" else state.ground.pop()
+        state.players[seat].insert_tile_to_hand(idx, placement.tile)
+        state.update_pip_counts(placement.tile, 1)
+
+    def get_draws(self, state: Union[DominoState, CompactDominoState]):
+        """lists the ids of the tiles left in the boneyard, each one a possible draw."""
+        if isinstance(state, CompactDominoState):
+            return list(iter_ids(state.boneyard))
+        return [tile.id for tile in state.tiles]
+
+    def draw_move(self, state: Union[DominoState, CompactDominoState], tid: int):
+        """Player with the turn draws a given tile from the boneyard, in place. The turn doesn't change.
+
+        Args:
+            state (DominoState | CompactDominoState): current state
+            tid (int): id of the boneyard tile
+
+        Returns:
+            tuple: undo record, to be handed to `undo_draw`
+        """
+        void = state.voids[state.turn_idx]
+        if isinstance(state, CompactDominoState):
+            state.draw(tid)
+            return (state.turn_idx, tid, void)
+
+        idx = next(i for i, tile in enumerate(state.tiles) if tile.id == tid)
+        state.show_void(drew=True)
+        state.players[state.turn_idx].append_tile_to_hand(state.tiles.pop(idx))
+        return (state.turn_idx, idx, void)
+
+    def undo_draw(self, state: Union[DominoState, CompactDominoState], record):
+        """Puts the tile drawn by `draw_move` back into its boneyard slot."""
+        if isinstance(state, CompactDominoState):
+            seat, tid, void = record
+            state.undo_draw(tid, seat, void)
+            return
+
+        seat, idx, state.voids[seat] = record
+        player = state.players[seat]
+        state.tiles.insert(idx, player.pop_tile_from_hand(-1))
+
+    def perft(self, state: Union[DominoState, CompactDominoState], depth: int):
+        """Counts the positions reachable from state in exactly depth plies, walking every legal continuation with make/unmake moves.
+
+        A ply is a placement, or when the seat can't place anything, a draw of any one boneyard tile (the seat keeps
+        the turn), or a pass once the boneyard is empty. Finished rounds are leaves that don't count unless depth is 0.
+
+        Args:
+            state (DominoState | CompactDominoState): start position, restored before returning
+            depth (int): number of plies
+
+        Returns:
+            int: number of positions at depth
+        """
+        if depth == 0:
+            return 1
+        if self.check_win(state) is not None or self.check_deadend(state) is not None:
+            return 0
+
+        nodes = 0
+        actions = self.get_actions(state)
+        if actions:
+            for action in actions:
+                record = self.apply_move(state, action)
+                nodes += self.perft(state, depth - 1)
+                self.undo_move(state, record)
+        elif self.get_draws(state):
+            for tid in self.get_draws(state):
+                record = self.draw_move(state, tid)
+                nodes += self.perft(state, depth - 1)
+                self.undo_draw(state, record)
+        else:
+            record = self.apply_move(state, None)
+            nodes += self.perft(state, depth - 1)
+            self.undo_move(state, record)
+        return nodes
+
     def check_win(self, state: DominoState):
         """Checks if a player has won the game and returns the winner's index.
 
@@ -177,9 +458,14 @@ class DominoGame:
         Returns:
             int: Winner index if a player has won, otherwise None.
         """
+        if isinstance(state, CompactDominoState):
+            for i, hand in enumerate(state.hands):
+                if not hand:
+                    return i
+            return None
+
         for i, player in enumerate(state.players):
             if len(player.hand) == 0:  # A player has emptied their hand
-                logging.info(f"WINNER: {player.name}")
                 return i  # Return the index of the winning player
         return None  # No winner yet
 
@@ -192,27 +478,25 @@ class DominoGame:
         Returns:
             int: Winner index if a dead-end occurs, otherwise None.
         """
+        if isinstance(state, CompactDominoState):
+            if not state.is_blocked():
+                return None
+            return min(range(state.num_players), key=state.pips.__getitem__)
+
         if not state.ground:
             return None  # No dead-end if the ground is empty
 
         l, r = self.get_ground_ends(state.ground)
 
-        # Check if no player can play and no tiles are left to draw
-        for player in state.players:
-            for tile in player.hand:
-                if l in tile or r in tile:
-                    return None  # A valid move is still possible
-
-        for tile in state.tiles:
-            if l in tile or r in tile:
-                return None  # A valid move is still possible
+        # Check if no player can play and no tiles are left to draw, from the running pip counts
+        if state.pip_counts[l] or state.pip_counts[r]:
+            return None  # A valid move is still possible
 
         # Dead-end detected, determine the winner by the lowest hand value
         winner = min(
             enumerate([player.count_hand() for player in state.players]),
             key=lambda x: x[1],
         )[0]
-        logging.info(f"  DEADEND, winner:{state.players[winner].name}")
         return winner
 
     def update_score(self, state: DominoState, winner: int):
@@ -231,25 +515,54 @@ class DominoGame:
         )
         state.players[winner].score += res
 
-    def evaluate_state(self, state: DominoState):
+    def evaluate_state(self, state: DominoState, seat: int = 1):
         """State evaluation for MCTS. It only favours less hand value. Under development to perform more sophisticated evaluation.
 
         Args:
-            state (DominoState): current domino state
+            state (DominoState | CompactDominoState): current domino state
+            seat (int, optional): seat whose hand is evaluated. Defaults to 1.
 
         Returns:
             int: state evaluation
             bool: state termination condition
         """
-        ai = state.players[1]
-        player_with_turn = state.players[state.turn_idx]
+        if isinstance(state, CompactDominoState):
+            return -state.pips[seat], not state.get_valid_moves()
+
+        ai = state.players[seat]
         val = -1 * (ai.count_hand())
-        is_terminal = not any(
-            any(condition)
-            for condition in self.get_valid_moves(player_with_turn, state.ground)
-        )
+        is_terminal = not self.get_actions(state)
         return val, is_terminal
 
+    def static_evaluation(self, state: Union[DominoState, CompactDominoState], seat: int, pip_weight=0.5, tile_weight=2):
+        """Heuristic value of a position, on the scale of `evaluate_state`, for rollouts cut off before the end of the round.
+
+        Starting from the seat's hand value, a seat ahead of the others is rewarded: its pip total below their mean
+        weighs pip_weight, each tile it holds less than their mean weighs tile_weight. Pip totals are running ones
+        and tile counts popcounts, so it costs a few operations per seat. A lone seat is only scored on its hand value.
+
+        Args:
+            state (DominoState | CompactDominoState): current domino state
+            seat (int): seat the position is evaluated for
+            pip_weight (float, optional): weight of the pip balance. Defaults to 0.5.
+            tile_weight (float, optional): weight of the tile count balance. Defaults to 2.
+
+        Returns:
+            float: state evaluation
+        """
+        if isinstance(state, CompactDominoState):
+            pips = state.pips
+            tiles = [hand.bit_count() for hand in state.hands]
+        else:
+            pips = [player.count_hand() for player in state.players]
+            tiles = [len(player.hand) for player in state.players]
+        others = len(pips) - 1
+        if not others:
+            return -pips[seat]
+        pip_balance = (sum(pips) - pips[seat]) / others - pips[seat]
+        tile_balance = (sum(tiles) - tiles[seat]) / others - tiles[seat]
+        return -pips[seat] + pip_weight * pip_balance + tile_weight * tile_balance
+
     def is_game_over(self, state):
         """Checks if the game is over."""
         # Check if any player has an empty hand
@@ -258,9 +571,8 @@ class DominoGame:
                 return True
 
         # Check if no valid moves are available for any player
-        for player in state.players:
-            valid_moves = self.get_valid_moves(player, state.ground)
-            if any(any(condition) for condition in valid_moves):
+        for seat in range(len(state.players)):
+            if self.get_player_actions(state, seat):
                 return False
 
         # If no valid moves and no empty hands, the game is over
@@ -277,6 +589,108 @@ class DominoGame:
         """
         return sum(player.count_hand() for player in state.players)
 
+    def draw_tiles(self, state: DominoState):
+        """Player with the turn draws from the boneyard until it gets a playable tile or the boneyard runs out.
+
+        Args:
+            state (DominoState): current domino state
+
+        Returns:
+            int: number of drawn tiles
+        """
+        player = state.players[state.turn_idx]
+        state.show_void(drew=True)
+        tile = state.tiles.pop()
+        drawn = 1
+        while not any(check_play(state.ground, tile)) and len(state.tiles) > 0:
+            player.append_tile_to_hand(tile)
+            tile = state.tiles.pop()
+            drawn += 1
+        player.append_tile_to_hand(tile)
+        return drawn
+
+    def play_round(self, placement_contexts, state: DominoState = None):
+        """Plays a single round between AI seats, headless: nothing is printed, logged or written.
+
+        Args:
+            placement_contexts (List[PlacementContext]): context of each seat
+            state (DominoState, optional): state to play the round from. Defaults to a fresh deal.
+
+        Returns:
+            RoundResult: round outcome. The winner's score is updated.
+        """
+        state = self.get_initial_state() if state is None else state
+        moves = []
+        turns = draws = no_moves_counter = 0
+        num_players = len(state.players)
+
+        while True:
+            seat = state.turn_idx
+            if not self.get_actions(state):
+                if state.tiles:
+                    draws += self.draw_tiles(state)
+                    continue
+                turns += 1
+                no_moves_counter += 1
+                state.show_void()
+                if no_moves_counter >= num_players:
+                    # Every seat is stuck, smallest hand value wins
+                    winner = min(range(num_players), key=lambda i: state.players[i].count_hand())
+                    break
+                state.change_turn()
+                continue
+
+            no_moves_counter = 0
+            turns += 1
+            action = placement_contexts[seat].calc(state)
+            state = self.get_next_state(state, action, state.players[seat])
+            side = "l" if state.ground[0].tile is action else "r"
+            moves.append((seat, action.id, side))
+
+            if not state.players[seat].hand:
+                winner = seat
+                break
+            winner = self.check_deadend(state)
+            if winner is not None:
+                break
+            state.change_turn()
+
+        points = sum(player.count_hand() for i, player in enumerate(state.players) if i != winner)
+        self.update_score(state, winner)
+        return RoundResult(
+            winner,
+            points,
+            [player.count_hand() for player in state.players],
+            turns,
+            draws,
+            moves,
+        )
+
+    def play_match(self, placement_contexts, final_score=101):
+        """Headless counterpart of `casual_game`: plays rounds until a seat scores more than final_score, as it does.
+
+        Scores are reset first, the winner of a round starts the next one. Nothing is printed, logged or written.
+
+        Args:
+            placement_contexts (List[PlacementContext]): context of each seat
+            final_score (int): The score that ends the match.
+
+        Returns:
+            MatchResult: match outcome
+        """
+        for player in self.players:
+            player.score = 0
+        rounds = []
+        starter = 0
+        while all(player.score <= final_score for player in self.players):
+            state = self.get_initial_state()
+            state.turn_idx = starter
+            result = self.play_round(placement_contexts, state)
+            rounds.append(result)
+            starter = result.winner
+        scores = [player.score for player in self.players]
+        return MatchResult(max(range(len(scores)), key=scores.__getitem__), scores, rounds)
+
     def display_ai_types(self):
         """Displays the AI type for each player."""
         for player in self.players:
@@ -315,18 +729,13 @@ class DominoGame:
                 if len(state.tiles) > 0:
                     if verbose:
                         print(f"{state.players[state.turn_idx].name} is drawing a tile...")
-                    tile = state.tiles.pop()
-                    while (
-                        not any(check_play(state.ground, tile)) and len(state.tiles) > 0
-                    ):
-                        state.players[state.turn_idx].append_tile_to_hand(tile)
-                        tile = state.tiles.pop()
-                    state.players[state.turn_idx].append_tile_to_hand(tile)
+                    game.draw_tiles(state)
                     no_moves_counter = 0  # Reset counter when a tile is drawn
                     continue
                 else:
                     if verbose:
                         print(f"{state.players[state.turn_idx].name} has no valid moves. Skipping turn.")
+                    state.show_void()
                     state.change_turn()
                     no_moves_counter += 1
                     # Check if all players are stuck
@@ -358,6 +767,10 @@ class DominoGame:
             c_win, c_deadend = game.check_win(state), game.check_deadend(state)
             winner = c_win if c_win is not None else c_deadend
             if winner is not None:  # A winner or dead-end was detected
+                if c_win is not None:
+                    logging.info(f"WINNER: {state.players[winner].name}")
+                else:
+                    logging.info(f"  DEADEND, winner:{state.players[winner].name}")
                 if type(winner) == int:
                     if verbose:
                         print(f"Round Over! Winner: {state.players[winner].name}")
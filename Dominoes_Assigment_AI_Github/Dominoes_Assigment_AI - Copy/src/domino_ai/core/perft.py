@@ -0,0 +1,73 @@
+import argparse
+import time
+
+from .domino_game import DominoGame
+
+
+def seeded_state(players=3, seed=0, num_tiles=7, compact=True, hand_size=None):
+    """deals the reproducible start position perft runs from.
+
+    Args:
+        players (int, optional): number of seats. Defaults to 3.
+        seed (int, optional): seed of the deal. Defaults to 0.
+        num_tiles (int, optional): number of pip values of the set. Defaults to 7 (double-six).
+        compact (bool, optional): return a `CompactDominoState` rather than a `DominoState`. Defaults to True.
+        hand_size (int, optional): tiles dealt to each seat, the rest forms the boneyard. Defaults to an even split of the set.
+
+    Returns:
+        DominoGame: game engine
+        DominoState | CompactDominoState: dealt state
+    """
+    game = DominoGame([f"ai{i + 1}" for i in range(players)], seed, num_tiles, hand_size)
+    state = game.get_initial_state()
+    return game, state.compact() if compact else state
+
+
+def divide(game, state, depth):
+    """perft count below each legal first ply, to spot where two engines disagree."""
+    counts = {}
+    if game.get_actions(state):
+        for action in game.get_actions(state):
+            record = game.apply_move(state, action)
+            counts[action] = game.perft(state, depth - 1)
+            game.undo_move(state, record)
+    else:
+        for tid in game.get_draws(state):
+            record = game.draw_move(state, tid)
+            counts[("draw", tid)] = game.perft(state, depth - 1)
+            game.undo_draw(state, record)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="perft move enumeration and engine speed benchmark")
+    parser.add_argument("--depth", type=int, default=5)
+    parser.add_argument("--players", type=int, default=3)
+    parser.add_argument("--num_tiles", type=int, default=7, help="pip values of the set: 7, 10 or 13")
+    parser.add_argument("--hand_size", type=int, help="tiles dealt to each seat, defaults to an even split")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--engine",
+        choices=["compact", "object"],
+        default="compact",
+        help="run on a CompactDominoState or on the reference DominoState",
+    )
+    parser.add_argument("--divide", action="store_true", help="print the count below each first ply")
+    args = parser.parse_args()
+
+    game, state = seeded_state(
+        args.players, args.seed, args.num_tiles, args.engine == "compact", args.hand_size
+    )
+    for depth in range(1, args.depth + 1):
+        start = time.perf_counter()
+        nodes = game.perft(state, depth)
+        elapsed = time.perf_counter() - start
+        print(f"depth {depth}: {nodes} nodes in {elapsed:.3f}s, {nodes / max(elapsed, 1e-9):.0f} nodes/s")
+
+    if args.divide:
+        for action, nodes in divide(game, state, args.depth).items():
+            print(f"{action}: {nodes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+from typing import List, Tuple
+
+from .bitboard import CompactDominoState, EMPTY_END, MAX_PIPS, TILES, count_tiles, iter_ids
+
+# TILE_INDEX[a][b] is the id of the tile showing a and b, either way round
+TILE_INDEX = [[0] * MAX_PIPS for _ in range(MAX_PIPS)]
+for _id, (_l, _r) in enumerate(TILES):
+    TILE_INDEX[_l][_r] = TILE_INDEX[_r][_l] = _id
+
+
+class Symmetry:
+    """Pip relabeling, optionally combined with a mirror of the ground, mapping a real position onto its canonical one.
+
+    Args:
+        perm (List[int]): canonical label of each real pip value
+        mirrored (bool): whether the left and right ground ends are swapped
+    """
+
+    def __init__(self, perm: List[int], mirrored: bool = False):
+        self.perm = perm
+        self.mirrored = mirrored
+        self.inverse = [0] * len(perm)
+        for real, canonical in enumerate(perm):
+            self.inverse[canonical] = real
+        self.tiles = [TILE_INDEX[perm[a]][perm[b]] for a, b in TILES[: count_tiles(len(perm))]]
+        self.inverse_tiles = [0] * len(self.tiles)
+        for real, canonical in enumerate(self.tiles):
+            self.inverse_tiles[canonical] = real
+
+    def __repr__(self):
+        return f"<Symmetry(perm={self.perm}, mirrored={self.mirrored})>"
+
+    def map_mask(self, mask: int) -> int:
+        """relabels the tiles of a real mask."""
+        mapped = 0
+        for i in iter_ids(mask):
+            mapped |= 1 << self.tiles[i]
+        return mapped
+
+    def map_voids(self, voids: int) -> int:
+        """relabels the pip values of a real void mask."""
+        mapped = 0
+        for pip, label in enumerate(self.perm):
+            if voids >> pip & 1:
+                mapped |= 1 << label
+        return mapped
+
+    def map_end(self, end: int) -> int:
+        return end if end == EMPTY_END else self.perm[end]
+
+    def map_side(self, side: str) -> str:
+        if not self.mirrored:
+            return side
+        return "r" if side == "l" else "l"
+
+    def to_canonical(self, action: Tuple[int, str]):
+        """maps a real (tile_id, side) action into canonical space. None (a pass) is left as is."""
+        if action is None:
+            return None
+        tid, side = action
+        return self.tiles[tid], self.map_side(side)
+
+    def to_real(self, action: Tuple[int, str]):
+        """maps a (tile_id, side) action chosen in canonical space back onto the real hand."""
+        if action is None:
+            return None
+        tid, side = action
+        return self.inverse_tiles[tid], self.map_side(side)
+
+    def apply(self, state: CompactDominoState) -> CompactDominoState:
+        """returns the relabeled (and possibly mirrored) copy of a real compact state."""
+        left, right = self.map_end(state.left), self.map_end(state.right)
+        if self.mirrored:
+            left, right = right, left
+        return CompactDominoState(
+            [self.map_mask(hand) for hand in state.hands],
+            self.map_mask(state.boneyard),
+            left,
+            right,
+            self.map_mask(state.played),
+            state.turn_idx,
+            full=self.map_mask(state.full),
+            voids=[self.map_voids(voids) for voids in state.voids],
+        )
+
+
+def _owners(state: CompactDominoState) -> List[int]:
+    """owner of every tile id: the seat holding it, len(hands) for the boneyard, len(hands) + 1 otherwise."""
+    owners = [len(state.hands) + 1] * len(TILES)
+    for i in iter_ids(state.boneyard):
+        owners[i] = len(state.hands)
+    for seat, hand in enumerate(state.hands):
+        for i in iter_ids(hand):
+            owners[i] = seat
+    return owners
+
+
+def _relabeling(owners: List[int], num_pips: int, ends: Tuple[int, int]) -> List[int]:
+    """canonical pip labels, keeping the values shown on the ground ends in place.
+
+    Free pip values are ranked by color refinement: a value's color starts from the owners of its tiles,
+    and is refined by the colors of the values it's paired with until the ranking settles. Values that are
+    still tied keep their real order, so the labeling is always a valid relabeling, but a few equivalent
+    positions may be left with distinct canonical forms.
+    """
+    fixed = [v for v in dict.fromkeys(ends) if v != EMPTY_END]
+    free = [v for v in range(num_pips) if v not in fixed]
+    # fixed values are told apart by their position among the ends
+    color = {v: (0, i) for i, v in enumerate(fixed)}
+    for v in free:
+        color[v] = (
+            1,
+            owners[TILE_INDEX[v][v]],
+            tuple(owners[TILE_INDEX[v][e]] for e in fixed),
+            tuple(sorted(owners[TILE_INDEX[v][w]] for w in free if w != v)),
+        )
+    for _ in range(len(free)):
+        ranks = {c: i for i, c in enumerate(sorted(set(color.values())))}
+        refined = {v: (0, i) for i, v in enumerate(fixed)}
+        for v in free:
+            refined[v] = (
+                1,
+                ranks[color[v]],
+                tuple(sorted((ranks[color[w]], owners[TILE_INDEX[v][w]]) for w in free if w != v)),
+            )
+        if len(set(refined.values())) == len(set(color.values())):
+            break
+        color = refined
+
+    perm = list(range(num_pips))
+    for label, v in zip(free, sorted(free, key=lambda v: (color[v], v))):
+        perm[v] = label
+    return perm
+
+
+def canonicalize(state) -> Tuple[int, Symmetry]:
+    """Maps a position onto a canonical representative of its symmetry class.
+
+    Two symmetries are used: relabeling the pip values that don't show on a ground end, and mirroring the
+    ground (swapping its left and right ends). Both keep the legal moves, draws, passes and turn order of
+    every continuation, so structural caches (opening books of moves, perft or domino-out tablebases) can be
+    shared by a whole class. Pip totals are not kept by a relabeling: values depending on hand pips (scores,
+    blocked round winners, `evaluate_state`) must be computed on the real position.
+
+    Args:
+        state (DominoState | CompactDominoState): position to canonicalize
+
+    Returns:
+        int: Zobrist key of the canonical position, equal for positions found equivalent
+        Symmetry: mapping of the position onto the canonical one. `to_real` turns a move chosen in
+            canonical space back into the real hand.
+    """
+    if not isinstance(state, CompactDominoState):
+        state = state.compact()
+    owners = _owners(state)
+    num_pips = state.num_pips
+
+    best = None
+    orders = [False] if state.left == state.right else [False, True]
+    for mirrored in orders:
+        ends = (state.right, state.left) if mirrored else (state.left, state.right)
+        symmetry = Symmetry(_relabeling(owners, num_pips, ends), mirrored)
+        canonical = symmetry.apply(state)
+        form = (canonical.left, canonical.right, canonical.boneyard, *canonical.hands)
+        if best is None or form < best[0]:
+            best = (form, canonical.key, symmetry)
+    return best[1], best[2]
@@ -6,7 +6,7 @@ def create_parser():
     parser.add_argument("--score", type=int, help="score at which game is over.")
     parser.add_argument(
         "--players",
-        nargs=2,
+        nargs="+",
         type=str,
         help='Enter names of players."player" must be contained in user name, and "ai" also must be contained in AI player name.',
     )
@@ -15,6 +15,11 @@ def create_parser():
         choices=["blind", "rule_based", "mcts"],
         help="the strategy AI will use to play.",
     )
+    parser.add_argument(
+        "--num_tiles",
+        type=int,
+        help="number of pip values of the domino set: 7 for double-six, 10 for double-nine, 13 for double-twelve.",
+    )
     parser.add_argument("--seed", type=int, help="setting seed for replication")
 
     return parser
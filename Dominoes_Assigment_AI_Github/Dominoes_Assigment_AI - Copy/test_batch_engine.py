@@ -0,0 +1,89 @@
+import random
+
+import numpy as np
+
+from src.domino_ai.ai.ai_stratigies import BlindStrategy, PlacementContext
+from src.domino_ai.core.batch_engine import WORD_BITS, BatchGames, to_words
+from src.domino_ai.core.bitboard import TILES, set_mask
+from src.domino_ai.core.perft import seeded_state
+
+# (pips, players, hand_size): seat wins, pips left, turns and draws of 1000 games dealt with seed 0
+SEEDED_RESULTS = {
+    (7, 4, None): ([373, 237, 231, 159], 32905, 25636, 0),
+    (7, 2, 7): ([545, 455], 20124, 19249, 8331),
+    (10, 3, None): ([389, 328, 283], 100553, 47357, 953),
+    (13, 6, None): ([209, 185, 176, 163, 126, 141], 154031, 93282, 999),
+}
+
+
+def popcount(masks):
+    return np.bitwise_count(masks).sum(axis=-1, dtype=np.int64)
+
+
+def test_seeded_results():
+    for (num_pips, players, hand_size), expected in SEEDED_RESULTS.items():
+        games = BatchGames.deal(1000, players, 0, num_pips, hand_size)
+        pips, winners = games.run()
+        assert np.array_equal(pips, games.hand_pips())
+        assert (np.bincount(winners, minlength=players).tolist(), int(pips.sum()), int(games.turns.sum()), int(games.draws.sum())) == expected
+
+
+def test_tiles_are_conserved_and_placed_on_the_ends():
+    for num_pips, players, hand_size in SEEDED_RESULTS:
+        games = BatchGames.deal(300, players, 1, num_pips, hand_size)
+        full = to_words(set_mask(num_pips), games.tables.num_words)
+        played = np.zeros_like(games.boneyard)
+        while True:
+            unplayed = np.bitwise_or.reduce(games.hands, axis=1) | games.boneyard
+            # hands and boneyard never share a tile, and with the played tiles they make up the set
+            assert np.array_equal(popcount(games.hands).sum(axis=1) + popcount(games.boneyard), popcount(unplayed))
+            assert (played & unplayed == 0).all() and ((played | unplayed) == full).all()
+            left, right = games.left.copy(), games.right.copy()
+            if not games.step():
+                break
+            placed = unplayed & ~(np.bitwise_or.reduce(games.hands, axis=1) | games.boneyard)
+            assert (popcount(placed) <= 1).all()
+            for game in np.flatnonzero(popcount(placed)):
+                word = int(np.flatnonzero(placed[game])[0])
+                tile = word * WORD_BITS + int(placed[game, word]).bit_length() - 1
+                a, b = TILES[tile]
+                new_left, new_right = games.left[game], games.right[game]
+                if left[game] == games.tables.empty:
+                    assert {new_left, new_right} == {a, b}
+                    continue
+                # the tile covers one end with a matching half, and leaves its other half open
+                on_left = left[game] in (a, b) and new_left == a + b - left[game] and new_right == right[game]
+                on_right = right[game] in (a, b) and new_right == a + b - right[game] and new_left == left[game]
+                assert on_left or on_right
+            played |= placed
+
+        pips = games.hand_pips()
+        rows = np.arange(games.num_games)
+        domino = popcount(games.hands[rows, games.winners]) == 0
+        # a blocked game goes to the smallest hand
+        assert (pips[rows, games.winners] == pips.min(axis=1))[~domino].all()
+        assert games.done.all()
+
+
+def test_batch_rollouts_agree_with_play_round():
+    # random play from the same deals, as BlindStrategy rounds and as batched games
+    for players, seed, placements in ((3, 1, 0), (4, 2, 3)):
+        game, state = seeded_state(players, seed, compact=False, hand_size=5)
+        for _ in range(placements):
+            game.apply_move(state, game.get_actions(state)[0])
+        contexts = [PlacementContext(BlindStrategy(game)) for _ in range(players)]
+        random.seed(0)
+        num_rounds = 4000
+        wins, turns = np.zeros(players), 0
+        for _ in range(num_rounds):
+            round_state = state.copy()
+            # play_round draws from the end of the boneyard, the batch engine at random
+            random.shuffle(round_state.tiles)
+            result = game.play_round(contexts, round_state)
+            wins[result.winner] += 1
+            turns += result.turns
+
+        games = BatchGames.from_state(state.compact(), 40000, seed=0)
+        _, winners = games.run()
+        assert np.abs(np.bincount(winners, minlength=players) / 40000 - wins / num_rounds).max() < 0.035
+        assert abs(games.turns.mean() - turns / num_rounds) < 0.5
@@ -21,14 +21,16 @@ def main():
         # initial game engine
         game = DominoGame(["mcts", "rule_based", "blind"])
     
-        
-        placement_contexts = [
-            PlacementContext(RuleBasedStrategy(game)),   # AI 1
-            PlacementContext(MCTSStrategy(game)),        # AI 2
-            PlacementContext(BlindStrategy(game)),       # AI 3
-        ]
-        
-        winner, score = game.casual_game(placement_contexts, config["score"])
+        with MCTSStrategy(game) as mcts:
+            placement_contexts = [
+                PlacementContext(RuleBasedStrategy(game)),   # AI 1
+                PlacementContext(mcts),                      # AI 2
+                PlacementContext(BlindStrategy(game)),       # AI 3
+            ]
+
+            # headless match, no terminal handling or logging in the loop
+            result = game.play_match(placement_contexts, config["score"])
+        winner = game.players[result.winner]
         
         ai_win_rates[winner.name] = ai_win_rates[winner.name] + 1
     
@@ -37,4 +39,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-    
@@ -0,0 +1,60 @@
+import random
+
+from src.domino_ai.core.bitboard import count_tiles, zobrist_key
+from src.domino_ai.core.perft import seeded_state
+
+
+def snapshot(state, compact):
+    """everything a ply may touch, down to the hand and boneyard slot order of object states."""
+    if compact:
+        return (
+            state.hands[:],
+            state.boneyard,
+            state.left,
+            state.right,
+            state.played,
+            state.turn_idx,
+            state.pips[:],
+            state.key,
+            state.voids[:],
+        )
+    return (
+        [(placement.id, placement.left, placement.right, placement.color) for placement in state.ground],
+        [tile.id for tile in state.tiles],
+        [[tile.id for tile in player.hand] for player in state.players],
+        state.turn_idx,
+        {pip: count for pip, count in state.pip_counts.items() if count},
+        state.voids[:],
+    )
+
+
+def play_out_and_back(game, state, compact, rng):
+    """plays random plies (placements, draws, passes) to the end of the round, then undoes them in reverse."""
+    history = []
+    while game.check_win(state) is None and game.check_deadend(state) is None:
+        before = snapshot(state, compact)
+        actions, draws = game.get_actions(state), game.get_draws(state)
+        if actions:
+            history.append((before, game.undo_move, game.apply_move(state, rng.choice(actions))))
+        elif draws:
+            history.append((before, game.undo_draw, game.draw_move(state, rng.choice(draws))))
+        else:
+            history.append((before, game.undo_move, game.apply_move(state, None)))
+        if compact:
+            assert state.key == zobrist_key(state.hands, state.left, state.right, state.played, state.turn_idx)
+    for before, undo, record in reversed(history):
+        undo(state, record)
+        assert snapshot(state, compact) == before
+    return len(history)
+
+
+def test_apply_undo_restores_the_state():
+    rng = random.Random(0)
+    for num_tiles in (7, 10, 13):
+        for players in range(2, 9):
+            # a seat's share is left in the boneyard, so lines go through draws
+            hand_size = count_tiles(num_tiles) // (players + 1)
+            for compact in (True, False):
+                for seed in range(3):
+                    game, state = seeded_state(players, seed, num_tiles, compact, hand_size)
+                    assert play_out_and_back(game, state, compact, rng) > 0
@@ -0,0 +1,41 @@
+from src.domino_ai.core.domino_game import DominoGame
+from src.domino_ai.ai.ai_stratigies import PlacementContext, RuleBasedStrategy
+
+
+def rule_based_game(players, seed):
+    """a seeded game whose seats all play the (deterministic) rules."""
+    game = DominoGame([f"ai{i + 1}" for i in range(players)], seed=seed)
+    return game, [PlacementContext(RuleBasedStrategy(game)) for _ in range(players)]
+
+
+def test_round_result():
+    game, contexts = rule_based_game(3, 3)
+    result = game.play_round(contexts)
+    # a blocked round, the smallest hand wins the pips of the others
+    assert (result.winner, result.points, result.hands, result.turns, result.draws) == (0, 7, [1, 5, 2], 24, 1)
+    assert result.moves[:6] == [(0, 20, "l"), (1, 19, "l"), (2, 26, "r"), (0, 14, "l"), (1, 27, "r"), (2, 23, "r")]
+    assert len(result.moves) == 23
+    assert len({tid for _, tid, _ in result.moves}) == len(result.moves)
+    assert game.players[0].score == 7
+
+
+def test_match_result():
+    game, contexts = rule_based_game(2, 3)
+    result = game.play_match(contexts, 50)
+    assert (result.winner, result.scores, len(result.rounds), result.turns) == (0, [70, 6], 11, 296)
+    assert [r.winner for r in result.rounds] == [0, 0, 1, 1, 0, 0, 0, 0, 1, 0, 0]
+    for seat, score in enumerate(result.scores):
+        assert score == sum(r.points for r in result.rounds if r.winner == seat)
+    for r in result.rounds:
+        assert r.points == sum(r.hands) - r.hands[r.winner]
+        assert r.hands[r.winner] == 0 or r.hands[r.winner] == min(r.hands)
+    assert result.moves == [r.moves for r in result.rounds]
+
+
+def test_match_ends_over_the_final_score():
+    # seat 0 has exactly 20 points after two rounds: like casual_game, the match only ends past the final score
+    game, contexts = rule_based_game(2, 3)
+    assert len(game.play_match(contexts, 19).rounds) == 2
+    game, contexts = rule_based_game(2, 3)
+    result = game.play_match(contexts, 20)
+    assert len(result.rounds) > 2 and max(result.scores) > 20
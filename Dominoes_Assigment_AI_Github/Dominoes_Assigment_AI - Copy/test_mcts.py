@@ -0,0 +1,61 @@
+import random
+
+from src.domino_ai.ai.ismcts import determinize
+from src.domino_ai.ai.mcts import MCTS
+from src.domino_ai.core.bitboard import PIP_MASKS
+from src.domino_ai.core.perft import seeded_state
+
+
+ARGS = {"C": 1.4, "num_searches": 200, "seed": 0, "tt_size": 1000, "rollout_policy": "rule_based", "puct": True}
+
+
+def test_search_leaves_the_global_generator_alone():
+    game, state = seeded_state(3, 0, hand_size=7)
+    random.seed(1)
+    expected = [random.random() for _ in range(3)]
+    random.seed(1)
+    mcts = MCTS(game, dict(ARGS))
+    mcts.search(state)
+    assert [random.random() for _ in range(3)] == expected
+
+
+def test_seeded_searches_are_reproducible():
+    game, state = seeded_state(3, 0, hand_size=7)
+    probs = [MCTS(game, dict(ARGS, ismcts=ismcts)).search(state) for ismcts in (False, False, True, True)]
+    assert probs[0] == probs[1] and probs[2] == probs[3]
+
+
+def passed_position(rng):
+    """a three seat deal, played at random (drawing when stuck) up to the first pass."""
+    while True:
+        game, state = seeded_state(3, rng.randrange(1000), hand_size=8)
+        while game.check_win(state) is None and game.check_deadend(state) is None:
+            actions, draws = game.get_actions(state), game.get_draws(state)
+            if actions:
+                game.apply_move(state, rng.choice(actions))
+            elif draws:
+                game.draw_move(state, rng.choice(draws))
+            else:
+                seat, ends = state.turn_idx, (state.left, state.right)
+                game.apply_move(state, None)
+                return state, seat, ends
+
+
+def test_determinizations_respect_a_pass():
+    rng = random.Random(0)
+    checked = 0
+    while checked < 5:
+        state, passed, ends = passed_position(rng)
+        assert state.voids[passed] & (1 << ends[0] | 1 << ends[1]) == 1 << ends[0] | 1 << ends[1]
+        shown = PIP_MASKS[ends[0]] | PIP_MASKS[ends[1]]
+        observer = (passed + 1) % 3
+        # only positions where the other opponent holds tiles showing the ends, that a deal by hand size alone
+        # would hand around
+        if not state.hands[(passed + 2) % 3] & shown:
+            continue
+        checked += 1
+        for _ in range(20):
+            world = determinize(state, observer, rng)
+            assert world.hands[observer] == state.hands[observer]
+            assert [hand.bit_count() for hand in world.hands] == [hand.bit_count() for hand in state.hands]
+            assert not world.hands[passed] & shown
@@ -0,0 +1,26 @@
+from src.domino_ai.core.perft import seeded_state
+
+
+# (players, seed, hand_size): perft counts from depth 1, on the seeded deal of `seeded_state`
+PERFT_COUNTS = {
+    (4, 0, None): [7, 21, 69, 215, 569, 1432],
+    (3, 0, 5): [5, 11, 38, 157, 826, 4481],
+    (2, 0, 7): [7, 34, 176, 1095, 6693],
+    (2, 0, 3): [3, 25, 225, 2059],
+}
+
+
+def test_compact_perft_counts():
+    for (players, seed, hand_size), counts in PERFT_COUNTS.items():
+        game, state = seeded_state(players, seed, compact=True, hand_size=hand_size)
+        before = repr(state)
+        assert [game.perft(state, depth) for depth in range(1, len(counts) + 1)] == counts
+        assert repr(state) == before
+
+
+def test_reference_engine_agrees():
+    for (players, seed, hand_size), counts in PERFT_COUNTS.items():
+        game, state = seeded_state(players, seed, compact=False, hand_size=hand_size)
+        before = repr(state)
+        assert [game.perft(state, depth) for depth in range(1, len(counts))] == counts[:-1]
+        assert repr(state) == before
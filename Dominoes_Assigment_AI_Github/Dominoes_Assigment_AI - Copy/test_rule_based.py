@@ -0,0 +1,83 @@
+import random
+
+from src.domino_ai.core.domino_components import Domino, Placement
+from src.domino_ai.core.domino_game import DominoGame, DominoState
+from src.domino_ai.core.perft import seeded_state
+from src.domino_ai.ai.ai_stratigies import PlacementContext, RuleBasedStrategy
+
+
+def make_state(ground, hand):
+    """two seat state with ground (left to right, as (left, right) pips) and the hand of the seat to move."""
+    game = DominoGame(["a", "b"], seed=0)
+    players = game.players
+    players[0].set_hand([Domino(*tile) for tile in hand])
+    players[1].set_hand([Domino(0, 0)])
+    placements = [Placement(Domino(l, r), flipped=l > r) for l, r in ground]
+    return game, DominoState(placements, [], players, 0)
+
+
+def test_features_read_the_half_left_open():
+    # ends 3 and 5: [3|6] covers the 3 and leaves 6 open, [1|5] covers the 5 and leaves 1 open, [3|5] fits both
+    game, state = make_state([(3, 4), (4, 5)], [(3, 6), (1, 5), (3, 5), (6, 6), (1, 6)])
+    actions, features = RuleBasedStrategy(game).get_features(state)
+    assert actions == [(Domino(3, 6).id, "l"), (Domino(1, 5).id, "r"), (Domino(3, 5).id, "l")]
+    assert features == [(9, False, 3, 1, False), (6, False, 2, 1, False), (8, False, 0, 0, False)]
+
+
+def test_equal_ends_score_both_sides():
+    # generate_moves only lists the left placement when both ends show the same pip
+    game, state = make_state([(4, 4)], [(3, 4), (3, 6), (4, 6), (5, 6)])
+    actions, features = RuleBasedStrategy(game).get_features(state)
+    assert actions == [(Domino(3, 4).id, "l"), (Domino(4, 6).id, "r")]
+    assert features == [(7, False, 0, 0, False), (10, False, 0, 0, False)]
+
+
+def played_positions(rounds=5, seed=0):
+    """positions of a few random rounds, with draws and passes."""
+    rng = random.Random(seed)
+    states = []
+    for round_seed in range(rounds):
+        game, state = seeded_state(3, round_seed, compact=False, hand_size=6)
+        while game.check_win(state) is None and game.check_deadend(state) is None:
+            states.append(state.copy())
+            actions, draws = game.get_actions(state), game.get_draws(state)
+            if actions:
+                game.apply_move(state, rng.choice(actions))
+            elif draws:
+                game.draw_move(state, rng.choice(draws))
+            else:
+                game.apply_move(state, None)
+    return game, states
+
+
+def score_alone(strategy, state):
+    """the rules scored one tile at a time on the features of a single state, first tile in hand order winning ties."""
+    weights = strategy.args
+    best, tile_scores = None, {}
+    for action, (value, double, in_hand, on_ground, blocking) in zip(*strategy.get_features(state)):
+        score = (
+            value * weights["tile_value"] * (weights["double_tiles"] if double else 1)
+            + in_hand * weights["tiles_in_hand"]
+            - on_ground * weights["tiles_in_ground"]
+            + blocking * weights["blocking_bonus"]
+        )
+        if best is None or score > tile_scores[best[0]]:
+            best = action
+        tile_scores[action[0]] = score
+    return best, {action: tile_scores[action[0]] for action in strategy.game.get_actions(state)}
+
+
+def test_batch_matches_the_rules_scored_per_state():
+    game, states = played_positions()
+    context = PlacementContext(RuleBasedStrategy(game))
+    before = [repr(state) for state in states]
+    actions, scores = context.calc_many(states, return_scores=True)
+    assert [repr(state) for state in states] == before
+    assert None in actions
+    for state, action, action_scores in zip(states, actions, scores):
+        expected_action, expected_scores = score_alone(context.strategy, state)
+        assert action == expected_action
+        assert action_scores.keys() == expected_scores.keys()
+        for key, score in action_scores.items():
+            assert abs(score - expected_scores[key]) < 1e-9
+    assert context.calc_many(states) == actions
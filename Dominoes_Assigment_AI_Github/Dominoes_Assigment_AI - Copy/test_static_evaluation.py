@@ -0,0 +1,16 @@
+from src.domino_ai.core.perft import seeded_state
+
+
+def test_single_seat_scores_its_hand_value():
+    for compact in (True, False):
+        game, state = seeded_state(1, 0, compact=compact, hand_size=7)
+        pips = state.pips[0] if compact else state.players[0].count_hand()
+        assert game.static_evaluation(state, 0) == -pips
+
+
+def test_balance_rewards_the_seat_ahead():
+    for compact in (True, False):
+        game, state = seeded_state(3, 0, compact=compact, hand_size=7)
+        pips = list(state.pips) if compact else [player.count_hand() for player in state.players]
+        expected = -pips[0] + 0.5 * ((pips[1] + pips[2]) / 2 - pips[0])
+        assert game.static_evaluation(state, 0) == expected
@@ -0,0 +1,48 @@
+import random
+
+from src.domino_ai.core.bitboard import EMPTY_END
+from src.domino_ai.core.perft import seeded_state
+from src.domino_ai.core.symmetry import Symmetry, canonicalize
+
+
+def random_position(players, seed, num_tiles, rng):
+    """a seeded deal a few random placements in."""
+    game, state = seeded_state(players, seed, num_tiles, compact=True, hand_size=5)
+    for _ in range(rng.randrange(6)):
+        actions = game.get_actions(state)
+        if not actions:
+            break
+        state.apply(rng.choice(actions))
+    return state
+
+
+def random_symmetry(state, rng):
+    """relabels the pip values off the ground ends at random, and mirrors the ground half of the time."""
+    ends = {state.left, state.right} - {EMPTY_END}
+    free = [v for v in range(state.num_pips) if v not in ends]
+    perm = list(range(state.num_pips))
+    for real, label in zip(free, rng.sample(free, len(free))):
+        perm[real] = label
+    return Symmetry(perm, state.left != state.right and rng.random() < 0.5)
+
+
+def test_equivalent_positions_share_their_key():
+    rng = random.Random(0)
+    for num_tiles in (7, 10, 13):
+        for players in (2, 3, 4):
+            for seed in range(5):
+                state = random_position(players, seed, num_tiles, rng)
+                equivalent = random_symmetry(state, rng).apply(state)
+                assert canonicalize(state)[0] == canonicalize(equivalent)[0]
+
+
+def test_canonical_moves_map_back_to_legal_moves():
+    rng = random.Random(1)
+    for seed in range(10):
+        state = random_position(3, seed, 7, rng)
+        key, symmetry = canonicalize(state)
+        canonical = symmetry.apply(state)
+        assert canonical.key == key
+        real_moves = sorted(state.get_valid_moves())
+        assert sorted(symmetry.to_real(action) for action in canonical.get_valid_moves()) == real_moves
+        assert sorted(symmetry.to_real(symmetry.to_canonical(action)) for action in real_moves) == real_moves
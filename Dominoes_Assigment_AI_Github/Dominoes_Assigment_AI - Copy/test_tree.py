@@ -0,0 +1,125 @@
+from src.domino_ai.ai.mcts import MCTS
+from src.domino_ai.core.perft import seeded_state
+
+
+def grown_tree(num_searches=400, tt_size=1000):
+    """the tree of a seeded sequential search, with the state it was grown from."""
+    game, state = seeded_state(3, 0, hand_size=7)
+    mcts = MCTS(game, {"C": 1.4, "num_searches": num_searches, "seed": 0, "tt_size": tt_size})
+    mcts.search(state)
+    return game, state, mcts.tree, mcts.root
+
+
+def expanded_nodes(tree, root=0):
+    """root and its descendants in the tree proper, leaving out the untried children of a block."""
+    nodes = [root]
+    for node in nodes:
+        nodes.extend(int(child) for child in tree.children(node))
+    return nodes
+
+
+def path(tree, node):
+    """actions leading from the root of tree to node."""
+    actions = []
+    while tree.parent[node] >= 0:
+        actions.append(tree.action(node))
+        node = tree.parent[node]
+    return actions[::-1]
+
+
+def nodes_by_path(tree):
+    """(visits, value sum, expanded children) of every node, by its path from the root."""
+    return {
+        tuple(path(tree, node)): (tree.visit_count(node), tree.value_sum(node), tree.num_expanded[node])
+        for node in expanded_nodes(tree)
+    }
+
+
+def position_key(game, state, actions):
+    records = [game.apply_move(state, action) for action in actions]
+    key = game.get_state_key(state)
+    for record in reversed(records):
+        game.undo_move(state, record)
+    return key
+
+
+def test_node_keys_follow_their_path():
+    game, state, tree, root = grown_tree()
+    for node in expanded_nodes(tree, root):
+        assert int(tree.key[node]) == position_key(game, state, path(tree, node))
+
+
+def test_find_returns_a_node_of_the_position():
+    game, state, tree, root = grown_tree()
+    for node in expanded_nodes(tree, root)[::7]:
+        depth = len(path(tree, node))
+        found = tree.find(root, int(tree.key[node]), depth)
+        assert found >= 0 and tree.key[found] == tree.key[node]
+        assert len(path(tree, found)) <= depth
+        if depth:
+            assert tree.find(root, int(tree.key[node]), depth - 1) in (-1, found)
+    assert tree.find(root, 12345, 3) == -1
+
+
+def test_prune_keeps_a_consistent_subtree():
+    game, state, tree, root = grown_tree()
+    before = nodes_by_path(tree)
+    size = len(tree)
+    assert tree.prune(root, size // 3) == 0
+    assert len(tree) <= size // 3
+    after = nodes_by_path(tree)
+    assert len(after) > 1
+    for actions, (visits, value_sum, _) in after.items():
+        assert before[actions][:2] == (visits, value_sum)
+    for node in expanded_nodes(tree):
+        assert int(tree.key[node]) == position_key(game, state, path(tree, node))
+        for child in tree.children(node):
+            assert tree.parent[child] == node
+    # the most visited parents keep their children
+    assert after[()][2] == before[()][2]
+
+
+def test_prune_reroots_on_a_subtree():
+    game, state, tree, root = grown_tree()
+    child = max(tree.children(root), key=tree.visit_count)
+    action = tree.action(child)
+    before = {actions[1:]: stats for actions, stats in nodes_by_path(tree).items() if actions[:1] == (action,)}
+    tree.prune(child, len(tree))
+    assert nodes_by_path(tree) == before
+    game.apply_move(state, action)
+    assert int(tree.key[0]) == game.get_state_key(state)
+    assert tree.parent[0] == -1
+
+
+def test_pruning_keeps_the_root_statistics():
+    # double-twelve opening, more root moves than max_nodes // 2
+    game, state = seeded_state(2, 0, 13, hand_size=8)
+    mcts = MCTS(game, {"C": 1.4, "num_searches": 500, "seed": 0, "tt_size": 0, "max_nodes": 10})
+    mcts.search(state)
+    root = mcts.root
+    assert len(game.get_actions(state)) > 5
+    # pruned many times over, each iteration adds at most one child block to the root's
+    assert len(mcts.tree) <= 2 * len(game.get_actions(state)) + 8
+    assert mcts.tree.visit_count(root) == 500
+    assert sum(visits for _, visits, _ in mcts.tree.action_stats(root)) == 500
+
+
+def test_reused_tree_is_compacted_to_the_new_root():
+    game, state = seeded_state(2, 0, hand_size=7)
+    mcts = MCTS(game, {"C": 1.4, "num_searches": 400, "seed": 0, "tt_size": 0, "reuse_tree": True})
+    probs = mcts.search(state)
+    first = mcts.tree
+    # the seat's move and the opponent's most visited reply
+    played = max(probs)[1]
+    node = next(child for child in first.children(mcts.root) if first.action(child) == played)
+    reply = max(first.children(node), key=first.visit_count)
+    carried = first.visit_count(reply)
+    for action in (played, first.action(reply)):
+        game.apply_move(state, action)
+    mcts.search(state)
+    tree = mcts.tree
+    assert tree is first and mcts.root == 0
+    assert tree.visit_count(0) == carried + 400
+    # every node hangs below the new root
+    assert tree.parent[0] == -1
+    assert all(0 <= tree.parent[node] < node for node in range(1, len(tree)))